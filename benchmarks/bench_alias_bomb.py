@@ -0,0 +1,58 @@
+"""
+Time to reject alias-bomb documents: `{ viewer { a0: books(first: 100) { title } ... aN: ... } }`
+
+    PYTHONPATH=. python benchmarks/bench_alias_bomb.py
+"""
+import time
+
+import graphene
+from graphql import GraphQLCoreBackend
+
+from graphql_limits import ProtectorBackend
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    books = graphene.List(lambda: Book, first=graphene.Int())
+
+    def resolve_books(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+
+def alias_bomb(aliases):
+    return '{ viewer { ' + ' '.join(f'a{i}: books(first: 100) {{ title }}' for i in range(aliases)) + ' } }'
+
+
+BACKENDS = {
+    'graphql-core': GraphQLCoreBackend,
+    'depth/nodes limits': lambda: ProtectorBackend(depth_limit=10, nodes_limit=1_000_000),
+    'max_aliases=100': lambda: ProtectorBackend(depth_limit=10, nodes_limit=1_000_000, max_aliases=100),
+}
+
+
+def main():
+    schema = graphene.Schema(query=Query)
+    for aliases in (100, 500, 2_000):
+        query_string = alias_bomb(aliases)
+        for name, create_backend in BACKENDS.items():
+            # a new backend for every request, so analysis isn't cached
+            started = time.perf_counter()
+            result = schema.execute(query_string, backend=create_backend())
+            elapsed = time.perf_counter() - started
+            verdict = type(result.errors[0]).__name__ if result.errors else 'executed'
+            print(f'aliases={aliases} backend={name!r} {elapsed * 1000:.1f}ms {verdict}')
+
+
+if __name__ == '__main__':
+    main()
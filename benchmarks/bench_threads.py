@@ -0,0 +1,73 @@
+"""
+Throughput of one ProtectorBackend shared between threads.
+
+    PYTHONPATH=. python benchmarks/bench_threads.py
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import graphene
+
+from graphql_limits import ProtectorBackend
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    books = graphene.List(lambda: Book, first=graphene.Int())
+
+    def resolve_id(self, *args):
+        return 1
+
+    def resolve_books(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    author = graphene.Field(User)
+
+    def resolve_author(self, *args):
+        return {'id': 1}
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+
+QUERY = '''
+    query Test($first: Int) {
+        viewer {
+           books(first: $first) {
+                author {
+                    books(first: 4) {
+                        author { id }
+                    }
+                }
+           }
+        }
+    }
+'''
+
+REQUESTS = 2_000
+
+
+def main():
+    schema = graphene.Schema(query=Query)
+    backend = ProtectorBackend(nodes_limit=1_000, depth_limit=10)
+
+    def execute(first):
+        return schema.execute(QUERY, backend=backend, variable_values={'first': first})
+
+    for threads in (1, 2, 4, 8):
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            started = time.perf_counter()
+            list(executor.map(execute, [1, 2, 3, 4] * (REQUESTS // 4)))
+            elapsed = time.perf_counter() - started
+        print(f'threads={threads} requests/s={REQUESTS / elapsed:.0f}')
+
+
+if __name__ == '__main__':
+    main()
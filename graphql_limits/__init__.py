@@ -1,6 +1,45 @@
-from .query_limit import (
-    ProtectorBackend,
-    DepthLimitReached,
-    NodesLimitReached,
-    get_count_of_fetched_nodes,
-)
+import importlib
+import typing as t
+
+# graphql-core is imported only when something that needs it is used
+_LAZY_ATTRIBUTES = {
+    'ProtectorBackend': 'query_limit',
+    'DepthLimitReached': 'exceptions',
+    'NodesLimitReached': 'exceptions',
+    'AliasesLimitReached': 'exceptions',
+    'SelectionsLimitReached': 'exceptions',
+    'FieldsLimitReached': 'exceptions',
+    'ResponseSizeLimitReached': 'exceptions',
+    'get_count_of_fetched_nodes': 'query_limit',
+    'analyze_document': 'rules',
+    'get_response_size': 'analysis',
+    'evaluate_nodes_plan': 'analysis',
+    'LimitPolicy': 'analysis',
+    'DEFAULT_FIELD_SIZES': 'analysis',
+    'DEFAULT_FIELD_SIZE': 'analysis',
+    'LimitsAnalysisRule': 'rules',
+    'limits_rule': 'rules',
+    'LimitsMetrics': 'metrics',
+    'format_prometheus': 'metrics',
+    'LocalAnalysisCache': 'cache',
+    'MmapAnalysisCache': 'mmap_cache',
+    'SchemaTables': 'schema_tables',
+    'build_schema_tables': 'schema_tables',
+    'get_schema_fingerprint': 'schema_tables',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> t.Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> t.List[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,268 @@
+import typing as t
+
+from .exceptions import (
+    AliasesLimitReached,
+    DepthLimitReached,
+    FieldsLimitReached,
+    NodesLimitReached,
+    ResponseSizeLimitReached,
+    SelectionsLimitReached,
+)
+from .metrics import LimitsMetrics
+
+
+# Count of fetched nodes with pagination variables not substituted yet.
+# It's either an int (nothing depends on variables)
+# or (multiplier, constant, children) where multiplier is an int or a variable name
+# and the count is (constant + sum(children) or 1) * multiplier
+NodesPlan = t.Union[int, t.Tuple[t.Union[int, str], int, t.Tuple[t.Any, ...]]]
+
+
+INTROSPECTION_FIELDS = frozenset(('__schema', '__type', '__typename'))
+
+# estimated size of a serialized value of a leaf type in bytes
+DEFAULT_FIELD_SIZES = {
+    'Int': 11,
+    'Float': 24,
+    'String': 64,
+    'Boolean': 5,
+    'ID': 38,
+}
+# size of values of other scalars and enums
+DEFAULT_FIELD_SIZE = 32
+
+
+class LimitPolicy(t.NamedTuple):
+    depth_limit: t.Optional[int] = None
+    nodes_limit: t.Optional[int] = None
+    # limits below don't depend on variables and aren't checked for root fields
+    max_aliases: t.Optional[int] = None
+    max_selections_per_level: t.Optional[int] = None
+    max_total_fields: t.Optional[int] = None
+    # estimated size of the serialized response, see get_response_size
+    max_response_bytes: t.Optional[int] = None
+
+
+class RootFieldAnalysis(t.NamedTuple):
+    name: str
+    depth: int
+    nodes_plan: NodesPlan
+    # same form as nodes plan, 0 if the size isn't measured
+    size_plan: NodesPlan
+
+
+class OperationAnalysis(t.NamedTuple):
+    # 'query', 'mutation' or 'subscription'
+    operation: str
+    # only introspection fields are selected
+    introspection: bool
+    root_fields: t.Tuple[RootFieldAnalysis, ...]
+    # counted with fragments expanded
+    aliases: int
+    # the biggest selection set, inline fragments and spreads are merged into their parent
+    max_selections: int
+    total_fields: int
+    # int default values of variables declared by the operation
+    variable_defaults: t.Dict[str, int]
+
+
+def evaluate_nodes_plan(plan: NodesPlan, variable_values: t.Dict[str, t.Any]) -> int:
+    if isinstance(plan, int):
+        return plan
+
+    multiplier, fetched_nodes, children = plan
+    for child in children:
+        fetched_nodes += evaluate_nodes_plan(child, variable_values)
+
+    if not fetched_nodes:
+        fetched_nodes = 1
+
+    if isinstance(multiplier, str):
+        value = variable_values.get(multiplier)
+        # a missing or null variable doesn't paginate, the field is counted as without the argument
+        multiplier = int(value) if value is not None else 1
+
+    return fetched_nodes * multiplier
+
+
+def get_field_sizes(field_sizes: t.Optional[t.Dict[str, int]] = None) -> t.Dict[str, int]:
+    return {**DEFAULT_FIELD_SIZES, **(field_sizes or {})}
+
+
+def get_key_size(response_key: str) -> int:
+    # "key": and a comma
+    return len(response_key) + 4
+
+
+def get_selections_size_plan(constant: int, children: t.Iterable[t.Any]) -> NodesPlan:
+    children = tuple(children)
+    if not children:
+        return constant
+    return 1, constant, children
+
+
+def get_leaf_size_plan(key_size: int, multiplier: t.Union[int, str], value_size: int) -> NodesPlan:
+    """
+    Size plan of a leaf field: key + value * multiplier, the multiplier is more than 1 only for paginated lists
+    """
+    if isinstance(multiplier, int):
+        return key_size + value_size * multiplier
+    return 1, key_size, ((multiplier, value_size, ()),)
+
+
+def get_object_size_plan(
+    key_size: int,
+    multiplier: t.Union[int, str],
+    constant: int,
+    children: t.Iterable[t.Any],
+) -> NodesPlan:
+    """
+    Size plan of a field with selections: key + (braces + selections) * multiplier
+    """
+    children = tuple(children)
+    if not children and isinstance(multiplier, int):
+        return key_size + (constant + 2) * multiplier
+    return 1, key_size, ((multiplier, constant + 2, children),)
+
+
+def get_response_size(analysis: OperationAnalysis, variable_values: t.Dict[str, t.Any]) -> int:
+    """
+    Estimated size of serialized data of the operation in bytes,
+    analysis has to be made with field_sizes, see analyze_document
+    """
+    variable_values = {**analysis.variable_defaults, **variable_values}
+    return sum(evaluate_nodes_plan(size_plan, variable_values) for _, _, _, size_plan in analysis.root_fields)
+
+
+def get_operation_policies(
+    default_policy: LimitPolicy,
+    operation_policies: t.Optional[t.Dict[str, LimitPolicy]],
+) -> t.Dict[str, LimitPolicy]:
+    return {
+        'query': default_policy,
+        'mutation': default_policy,
+        'subscription': default_policy,
+        **(operation_policies or {}),
+    }
+
+
+def get_breadth_thresholds(policies: t.Iterable[LimitPolicy]) -> LimitPolicy:
+    """
+    Breadth limits that are exceeded by every policy, so analysis can stop as soon as a count is over them
+    """
+    def threshold(limits: t.List[t.Optional[int]]) -> t.Optional[int]:
+        return None if None in limits else max(limits)
+
+    policies = list(policies)
+    return LimitPolicy(
+        max_aliases=threshold([policy.max_aliases for policy in policies]),
+        max_selections_per_level=threshold([policy.max_selections_per_level for policy in policies]),
+        max_total_fields=threshold([policy.max_total_fields for policy in policies]),
+    )
+
+
+def _check_breadth(
+    policy: LimitPolicy,
+    aliases: int,
+    max_selections: int,
+    total_fields: int,
+    metrics: t.Optional[LimitsMetrics],
+) -> None:
+    if policy.max_aliases is not None and aliases > policy.max_aliases:
+        if metrics is not None:
+            metrics.observe_rejection('aliases')
+        raise AliasesLimitReached('Operation has a lot of aliases')
+
+    if policy.max_selections_per_level is not None and max_selections > policy.max_selections_per_level:
+        if metrics is not None:
+            metrics.observe_rejection('selections')
+        raise SelectionsLimitReached('Operation selects a lot of fields on one level')
+
+    if policy.max_total_fields is not None and total_fields > policy.max_total_fields:
+        if metrics is not None:
+            metrics.observe_rejection('fields')
+        raise FieldsLimitReached('Operation selects a lot of fields')
+
+
+def _check_policy(
+    policy: LimitPolicy,
+    depth: int,
+    fetched_nodes: t.Optional[int],
+    response_bytes: t.Optional[int],
+    metrics: t.Optional[LimitsMetrics],
+    subject: str,
+) -> None:
+    if policy.nodes_limit is not None and fetched_nodes > policy.nodes_limit:
+        if metrics is not None:
+            metrics.observe_rejection('nodes')
+        raise NodesLimitReached(f'{subject} fetches a lot of nodes')
+
+    if policy.max_response_bytes is not None and response_bytes > policy.max_response_bytes:
+        if metrics is not None:
+            metrics.observe_rejection('response_size')
+        raise ResponseSizeLimitReached(f'{subject} response is too big')
+
+    if policy.depth_limit is not None and depth > policy.depth_limit:
+        if metrics is not None:
+            metrics.observe_rejection('depth')
+        raise DepthLimitReached(f'{subject} is too deep')
+
+
+def check_analysis(
+    analysis: t.Iterable[OperationAnalysis],
+    variable_values: t.Dict[str, t.Any],
+    operation_policies: t.Dict[str, LimitPolicy],
+    root_field_policies: t.Dict[str, t.Dict[str, LimitPolicy]],
+    metrics: t.Optional[LimitsMetrics] = None,
+) -> None:
+    """
+    Raises DepthLimitReached, NodesLimitReached, ResponseSizeLimitReached, AliasesLimitReached,
+    SelectionsLimitReached or FieldsLimitReached if an operation doesn't fit its policies
+
+    operation_policies - operation type -> policy, see get_operation_policies
+    root_field_policies - operation type -> root field name -> policy
+    """
+    # shared caches may return plain lists instead of OperationAnalysis
+    for operation, introspection, root_fields, aliases, max_selections, total_fields, variable_defaults in analysis:
+        policy = None
+        if introspection:
+            policy = operation_policies.get('introspection')
+        if policy is None:
+            policy = operation_policies[operation]
+        # breadth is static and the cheapest to check
+        _check_breadth(policy, aliases, max_selections, total_fields, metrics)
+        field_policies = root_field_policies.get(operation, {})
+        # variables that aren't sent take default values of the operation
+        operation_variables = {**variable_defaults, **variable_values}
+
+        max_depth = 1
+        fetched_nodes = None
+        if policy.nodes_limit is not None:
+            fetched_nodes = 0
+        response_bytes = None
+        if policy.max_response_bytes is not None:
+            response_bytes = 0
+        for name, depth, nodes_plan, size_plan in root_fields:
+            max_depth = max(max_depth, depth)
+            field_policy = field_policies.get(name)
+            field_nodes = None
+            if fetched_nodes is not None or (field_policy and field_policy.nodes_limit is not None):
+                field_nodes = evaluate_nodes_plan(nodes_plan, operation_variables)
+            if fetched_nodes is not None:
+                fetched_nodes += field_nodes
+            field_bytes = None
+            if response_bytes is not None or (field_policy and field_policy.max_response_bytes is not None):
+                field_bytes = evaluate_nodes_plan(size_plan, operation_variables)
+            if response_bytes is not None:
+                response_bytes += field_bytes
+
+            if field_policy:
+                _check_policy(field_policy, depth, field_nodes, field_bytes, metrics, f'Field {name}')
+
+        if fetched_nodes is not None:
+            fetched_nodes = fetched_nodes or 1
+
+        if metrics is not None:
+            metrics.observe_operation(max_depth, fetched_nodes)
+
+        _check_policy(policy, max_depth, fetched_nodes, response_bytes, metrics, 'Operation')
@@ -0,0 +1,28 @@
+import threading
+import typing as t
+
+
+class LocalAnalysisCache:
+    def __init__(self, maxsize: int = 1024):
+        """
+        In-process cache of document analysis results that can be shared between threads.
+        Reads don't take a lock, writes are serialized and evict the oldest entry when the cache is full.
+
+        maxsize - how many analyzed documents are kept
+        """
+        self._maxsize = maxsize
+        self._data: t.Dict[str, t.Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> t.Any:
+        return self._data.get(key)
+
+    def set(self, key: str, value: t.Any) -> None:
+        with self._lock:
+            if key not in self._data and len(self._data) >= self._maxsize:
+                del self._data[next(iter(self._data))]
+            self._data[key] = value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
@@ -0,0 +1,25 @@
+from graphql import GraphQLError
+
+
+class DepthLimitReached(GraphQLError):
+    pass
+
+
+class NodesLimitReached(GraphQLError):
+    pass
+
+
+class ResponseSizeLimitReached(GraphQLError):
+    pass
+
+
+class AliasesLimitReached(GraphQLError):
+    pass
+
+
+class SelectionsLimitReached(GraphQLError):
+    pass
+
+
+class FieldsLimitReached(GraphQLError):
+    pass
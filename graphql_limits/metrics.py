@@ -0,0 +1,158 @@
+import threading
+import typing as t
+from bisect import bisect_left
+
+
+DEFAULT_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+DEFAULT_DEPTH_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34)
+DEFAULT_NODES_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+class Histogram:
+    def __init__(self, buckets: t.Iterable[float]):
+        """
+        buckets - upper bounds of the histogram buckets, an implicit +Inf bucket is always added
+        """
+        self.buckets = tuple(sorted(buckets))
+        # the last slot counts observations above the biggest bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> t.List[t.Tuple[float, int]]:
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class LimitsMetrics:
+    def __init__(
+        self,
+        latency_buckets: t.Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+        depth_buckets: t.Iterable[float] = DEFAULT_DEPTH_BUCKETS,
+        nodes_buckets: t.Iterable[float] = DEFAULT_NODES_BUCKETS,
+    ):
+        """
+        Counters filled by ProtectorBackend when it is created with `metrics=LimitsMetrics()`.
+        Subclass it and override observe_* methods to forward values to another metrics system.
+
+        latency_buckets - buckets (in seconds) for the time of limit checks and validation passes
+        depth_buckets - buckets for measured depth of operations
+        nodes_buckets - buckets for measured count of fetched nodes of operations
+        """
+        self._lock = threading.Lock()
+        # cache lookup and limit checks, measured for every execute
+        self.analysis_seconds = Histogram(latency_buckets)
+        # standard validation together with the analysis, measured only on cache misses
+        self.validation_seconds = Histogram(latency_buckets)
+        self.depth = Histogram(depth_buckets)
+        self.nodes = Histogram(nodes_buckets)
+        self.operations = 0
+        self.rejections: t.Dict[str, int] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def observe_analysis(self, seconds: float) -> None:
+        with self._lock:
+            self.analysis_seconds.observe(seconds)
+
+    def observe_validation(self, seconds: float) -> None:
+        with self._lock:
+            self.validation_seconds.observe(seconds)
+
+    def observe_operation(self, depth: t.Optional[int], nodes: t.Optional[int]) -> None:
+        """
+        nodes is None when nodes limit is not configured for the operation
+        """
+        with self._lock:
+            self.operations += 1
+            if depth is not None:
+                self.depth.observe(depth)
+            if nodes is not None:
+                self.nodes.observe(nodes)
+
+    def observe_rejection(self, reason: str) -> None:
+        with self._lock:
+            self.rejections[reason] = self.rejections.get(reason, 0) + 1
+
+    def observe_cache(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+
+def _format_bound(bound: float) -> str:
+    if bound == float('inf'):
+        return '+Inf'
+    return repr(float(bound))
+
+
+def _format_histogram(name: str, help_text: str, histogram: Histogram) -> t.List[str]:
+    lines = [
+        f'# HELP {name} {help_text}',
+        f'# TYPE {name} histogram',
+    ]
+    for bound, count in histogram.cumulative_counts():
+        lines.append(f'{name}_bucket{{le="{_format_bound(bound)}"}} {count}')
+    lines.append(f'{name}_sum {histogram.sum}')
+    lines.append(f'{name}_count {histogram.count}')
+    return lines
+
+
+def format_prometheus(metrics: LimitsMetrics, prefix: str = 'graphql_limits') -> str:
+    """
+    Renders metrics in the Prometheus text exposition format
+    """
+    with metrics._lock:
+        lines = []
+        lines += _format_histogram(
+            f'{prefix}_analysis_seconds',
+            'Time spent on analysis cache lookups and limit checks per execute.',
+            metrics.analysis_seconds,
+        )
+        lines += _format_histogram(
+            f'{prefix}_validation_seconds',
+            'Time spent on validation and analysis of documents missing in the analysis cache.',
+            metrics.validation_seconds,
+        )
+        lines += _format_histogram(
+            f'{prefix}_operation_depth',
+            'Measured depth of operations.',
+            metrics.depth,
+        )
+        lines += _format_histogram(
+            f'{prefix}_operation_nodes',
+            'Measured count of fetched nodes of operations.',
+            metrics.nodes,
+        )
+        lines += [
+            f'# HELP {prefix}_operations_total Analyzed operations.',
+            f'# TYPE {prefix}_operations_total counter',
+            f'{prefix}_operations_total {metrics.operations}',
+            f'# HELP {prefix}_rejections_total Rejected documents by reason.',
+            f'# TYPE {prefix}_rejections_total counter',
+        ]
+        for reason, count in sorted(metrics.rejections.items()):
+            lines.append(f'{prefix}_rejections_total{{reason="{reason}"}} {count}')
+        lines += [
+            f'# HELP {prefix}_cache_lookups_total Analysis cache lookups by result.',
+            f'# TYPE {prefix}_cache_lookups_total counter',
+            f'{prefix}_cache_lookups_total{{result="hit"}} {metrics.cache_hits}',
+            f'{prefix}_cache_lookups_total{{result="miss"}} {metrics.cache_misses}',
+        ]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,167 @@
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import typing as t
+import zlib
+from contextlib import contextmanager
+from hashlib import blake2b
+
+
+_MAGIC = b'GQLLIMC5'
+# magic, slots, slot size
+_HEADER = struct.Struct('<8sII')
+# key digest, value length, value crc32
+_SLOT_HEADER = struct.Struct('<16sII')
+_EMPTY_DIGEST = bytes(16)
+
+# fcntl locks are owned by processes: threads don't exclude each other with them
+# and closing any descriptor of a file releases them, so threads take this lock first
+_process_lock = threading.Lock()
+
+
+def _reset_process_lock() -> None:
+    # a thread of the parent could hold the lock during fork
+    global _process_lock
+    _process_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_process_lock)
+
+
+@contextmanager
+def _file_lock(file: t.BinaryIO) -> t.Iterator[None]:
+    fcntl.lockf(file.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.lockf(file.fileno(), fcntl.LOCK_UN)
+
+
+class MmapAnalysisCache:
+    def __init__(
+        self,
+        path: str,
+        slots: int = 4096,
+        slot_size: int = 512,
+        probes: int = 8,
+    ):
+        """
+        Cache of document analysis results in a memory-mapped file, so pre-fork worker processes
+        on one host share a single warmed cache. It's a fixed-size open addressing hash table:
+        memory is bounded by slots * slot_size, when all probed slots are taken the first one is overwritten.
+        Reads don't take locks (torn entries are detected by crc32), writes are serialized with a thread lock
+        and fcntl.lockf, so threads and processes forked after the cache is opened exclude each other too.
+        Backends put their analysis settings into keys, so backends with different settings can share a file.
+
+        path - file of the cache, created if missing or replaced with a new file if it has other slots/slot_size.
+            Processes that mapped the old file keep using it until they reopen the cache
+        slots - count of entries in the hash table
+        slot_size - bytes per entry, analysis that doesn't fit is not cached
+        probes - how many slots are checked for a key
+        """
+        self._slots = slots
+        self._slot_size = slot_size
+        self._probes = min(probes, slots)
+        self._value_size = slot_size - _SLOT_HEADER.size
+        size = _HEADER.size + slots * slot_size
+
+        with _process_lock:
+            self._open(path, size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+    def _open(self, path: str, size: int) -> None:
+        while True:
+            self._file = open(path, 'a+b')
+            new_file = None
+            with _file_lock(self._file):
+                try:
+                    # another process may have replaced the file while we waited for the lock
+                    replaced = not os.path.samestat(os.fstat(self._file.fileno()), os.stat(path))
+                except FileNotFoundError:
+                    replaced = True
+                if not replaced:
+                    self._file.seek(0)
+                    header = self._file.read(_HEADER.size)
+                    if (
+                        len(header) != _HEADER.size
+                        or _HEADER.unpack(header) != (_MAGIC, self._slots, self._slot_size)
+                        or os.fstat(self._file.fileno()).st_size != size
+                    ):
+                        # other processes may have the file mapped, resizing it in place would crash them with SIGBUS
+                        new_file = self._create_file(path, size)
+
+            if not replaced:
+                break
+            self._file.close()
+
+        if new_file is not None:
+            self._file.close()
+            self._file = new_file
+
+    def _create_file(self, path: str, size: int) -> t.BinaryIO:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path))
+        try:
+            new_file = os.fdopen(fd, 'r+b')
+            new_file.write(_HEADER.pack(_MAGIC, self._slots, self._slot_size))
+            new_file.truncate(size)
+            new_file.flush()
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return new_file
+
+    def _offsets(self, digest: bytes) -> t.Iterator[int]:
+        home = int.from_bytes(digest[:8], 'little') % self._slots
+        for probe in range(self._probes):
+            yield _HEADER.size + (home + probe) % self._slots * self._slot_size
+
+    def get(self, key: str) -> t.Any:
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        buffer = self._mmap
+        for offset in self._offsets(digest):
+            slot_digest, length, crc = _SLOT_HEADER.unpack_from(buffer, offset)
+            if slot_digest == _EMPTY_DIGEST:
+                return None
+            if slot_digest != digest:
+                continue
+
+            start = offset + _SLOT_HEADER.size
+            value = buffer[start:start + length]
+            if length > self._value_size or zlib.crc32(value) != crc:
+                # entry is being rewritten by another process
+                return None
+            return json.loads(value)
+
+        return None
+
+    def set(self, key: str, value: t.Any) -> None:
+        data = json.dumps(value, separators=(',', ':')).encode()
+        if len(data) > self._value_size:
+            return
+
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        buffer = self._mmap
+        with _process_lock, _file_lock(self._file):
+            offsets = list(self._offsets(digest))
+            target = offsets[0]
+            for offset in offsets:
+                slot_digest = buffer[offset:offset + 16]
+                if slot_digest == digest or slot_digest == _EMPTY_DIGEST:
+                    target = offset
+                    break
+
+            # readers skip the slot while it's written, the digest goes last
+            buffer[target:target + 16] = _EMPTY_DIGEST
+            start = target + _SLOT_HEADER.size
+            buffer[start:start + len(data)] = data
+            _SLOT_HEADER.pack_into(buffer, target, digest, len(data), zlib.crc32(data))
+
+    def close(self) -> None:
+        with _process_lock:
+            self._mmap.close()
+            self._file.close()
@@ -1,11 +1,19 @@
+import inspect
+import threading
+import time
 import typing as t
+from functools import partial
+from hashlib import sha1
 
 from graphql import (
     GraphQLSchema,
     GraphQLDocument,
 )
 from graphql.backend.core import GraphQLCoreBackend
+from graphql.execution import ExecutionResult, execute as graphql_execute
+from graphql.validation import validate, specified_rules
 from graphql.language.ast import (
+    Argument,
     FragmentDefinition,
     FragmentSpread,
     OperationDefinition,
@@ -16,13 +24,19 @@ from graphql.language.ast import (
     Variable,
 )
 
-
-class DepthLimitReached(Exception):
-    pass
-
-
-class NodesLimitReached(Exception):
-    pass
+from .analysis import (
+    LimitPolicy,
+    OperationAnalysis,
+    check_analysis,
+    get_field_sizes,
+    get_operation_policies,
+)
+from .cache import LocalAnalysisCache
+# exceptions are imported here to keep the old import path
+from .exceptions import DepthLimitReached, NodesLimitReached  # noqa: F401
+from .rules import LimitsAnalysisRule
+from .metrics import LimitsMetrics
+from .schema_tables import SchemaTables, build_schema_tables
 
 
 def get_fragments(definitions: t.Iterable[Definition]) -> t.Dict[str, FragmentDefinition]:
@@ -39,7 +53,7 @@ def get_max_depth(
     parent_depth: int = 0
 ) -> int:
     max_depth = parent_depth + 1
-    if node.name and node.name.value == '__schema':
+    if isinstance(node, Field) and node.name.value == '__schema':
         return max_depth
 
     if not node.selection_set:
@@ -53,13 +67,29 @@ def get_max_depth(
         depth = get_max_depth(
             field,
             fragments,
-            max_depth,
+            parent_depth + 1,
         )
         max_depth = max(max_depth, depth)
 
     return max_depth
 
 
+def get_pagination_argument(
+    node: t.Union[OperationDefinition, Field],
+    pagination_arguments: t.Iterable[str],
+) -> t.Optional[Argument]:
+    if not isinstance(node, Field) or not node.arguments:
+        return None
+
+    return next(
+        (
+            arg for arg in node.arguments
+            if arg.name.value in pagination_arguments
+        ),
+        None
+    )
+
+
 def get_count_of_fetched_nodes(
     node: t.Union[OperationDefinition, Field],
     fragments: t.Dict[str, FragmentDefinition],
@@ -67,7 +97,7 @@ def get_count_of_fetched_nodes(
     variable_values: t.Dict[str, t.Any],
 ) -> int:
     fetched_nodes = 0
-    if node.name and node.name.value == '__schema':
+    if isinstance(node, Field) and node.name.value == '__schema':
         return 1
 
     if not node.selection_set:
@@ -88,50 +118,169 @@ def get_count_of_fetched_nodes(
     if not fetched_nodes:
         fetched_nodes += 1
 
-    if isinstance(node, Field):
-        if node.arguments:
-            pagination_arg = next(
-                (
-                    arg for arg in node.arguments
-                    if arg.name.value in pagination_arguments
-                ),
-                None
-            )
-
-            if pagination_arg:
-                if isinstance(pagination_arg.value, Variable):
-                    value = int(variable_values[pagination_arg.value.name.value])
-                    fetched_nodes *= value
-                elif isinstance(pagination_arg.value, IntValue):
-                    value = int(pagination_arg.value.value)
-                    fetched_nodes *= value
+    pagination_arg = get_pagination_argument(node, pagination_arguments)
+    if pagination_arg:
+        if isinstance(pagination_arg.value, Variable):
+            value = int(variable_values[pagination_arg.value.name.value])
+            fetched_nodes *= value
+        elif isinstance(pagination_arg.value, IntValue):
+            value = int(pagination_arg.value.value)
+            fetched_nodes *= value
 
     return fetched_nodes
 
 
+class _AnalysisStopped(Exception):
+    pass
+
+
+# document.execute passes its arguments to execute after the schema and the document
+_EXECUTE_SIGNATURE = inspect.signature(graphql_execute)
+
+
+def _get_variable_values(args: t.Tuple[t.Any, ...], kwargs: t.Dict[str, t.Any]) -> t.Optional[t.Dict[str, t.Any]]:
+    arguments = _EXECUTE_SIGNATURE.bind_partial(None, None, *args, **kwargs).arguments
+    variable_values = arguments.get('variable_values')
+    if variable_values is None:
+        # deprecated alias of variable_values
+        variable_values = arguments.get('options', {}).get('variables')
+    return variable_values
+
+
 class ProtectorBackend(GraphQLCoreBackend):
     def __init__(
         self,
         *args: t.Any,
-        variable_values: t.Dict[str, t.Any],
+        variable_values: t.Dict[str, t.Any] = None,
         depth_limit: int = None,
         nodes_limit: int = None,
+        max_aliases: int = None,
+        max_selections_per_level: int = None,
+        max_total_fields: int = None,
+        max_response_bytes: int = None,
+        field_sizes: t.Dict[str, int] = None,
         pagination_arguments: t.Iterable[str] = ('first', 'last'),
+        metrics: LimitsMetrics = None,
+        analysis_cache: t.Any = None,
+        operation_policies: t.Dict[str, LimitPolicy] = None,
+        root_field_policies: t.Dict[str, LimitPolicy] = None,
         **kwargs: t.Any,
     ):
         """
-        variable_values - variables dict if arguments for graphql operations pass in request body
+        The backend keeps no request state, one instance can be shared between threads.
+
+        variable_values - default variables dict, used only when variables are not passed to execute
         depth_limit - depth limit for graphql operations
         nodes_limit - how many nodes can be fetch.
             Example: {books(first: 100) {author { books(first: 100) }}} this query will fetch 100 * 100 nodes
+        max_aliases - how many aliased fields an operation can have, fragments are counted every time they are spread
+        max_selections_per_level - how many fields can be selected in one selection set
+        max_total_fields - how many fields an operation can select, fragments are counted every time they are spread
+        max_response_bytes - limit of the estimated size of serialized data, see get_response_size.
+            Example: {books(first: 100) {title}} is estimated as 100 * ({"title":} + 64 bytes of a string)
+        field_sizes - estimated size of serialized values per scalar or enum type name, e.g. {'HTML': 4096}.
+            Default: DEFAULT_FIELD_SIZES, other leaf types take DEFAULT_FIELD_SIZE bytes
         pagination_arguments - list of pagination argument names(it can be 'first', 'count' etc. )
             Default: 'first', 'last'
+        metrics - LimitsMetrics instance that collects analysis latency, measured depth/nodes and rejections.
+            Default: None, nothing is measured
+        analysis_cache - cache of analyzed documents, any object with get(key) and set(key, value) methods.
+            Default: LocalAnalysisCache(), MmapAnalysisCache shares analysis between processes
+        operation_policies - limits per operation type: 'query', 'mutation', 'subscription' or 'introspection'.
+            Operation types without a policy use depth_limit, nodes_limit, max_response_bytes and breadth limits.
+            Example: {'mutation': LimitPolicy(depth_limit=3, nodes_limit=10)}
+        root_field_policies - depth, nodes and response size limits per root field,
+            checked in addition to the operation limits.
+            Example: {'Query.search': LimitPolicy(nodes_limit=100)}
         """
         super().__init__(*args, **kwargs)
-        self._depth_limit = depth_limit
-        self._nodes_limit = nodes_limit
-        self._variable_values = variable_values
-        self._pagination_arguments = pagination_arguments
+        self._operation_policies = get_operation_policies(
+            LimitPolicy(
+                depth_limit,
+                nodes_limit,
+                max_aliases,
+                max_selections_per_level,
+                max_total_fields,
+                max_response_bytes,
+            ),
+            operation_policies,
+        )
+        self._root_field_policies = root_field_policies or {}
+        # response size is estimated only if some policy limits it
+        self._field_sizes = None
+        if any(
+            policy.max_response_bytes is not None
+            for policy in (*self._operation_policies.values(), *self._root_field_policies.values())
+        ):
+            self._field_sizes = get_field_sizes(field_sizes)
+        # resolved policies or the error message of misconfigured policies
+        self._resolved_root_field_policies: t.Dict[
+            GraphQLSchema, t.Union[str, t.Dict[str, t.Dict[str, LimitPolicy]]]
+        ] = {}
+        self._variable_values = variable_values or {}
+        self._pagination_arguments = tuple(pagination_arguments)
+        self._metrics = metrics
+        self._analysis_cache = analysis_cache if analysis_cache is not None else LocalAnalysisCache()
+        self._schema_tables: t.Dict[GraphQLSchema, SchemaTables] = {}
+        self._schema_tables_lock = threading.Lock()
+        # analysis depends on these settings, they are a part of cache keys to share a cache between backends
+        self._analysis_settings = sha1(repr((
+            self._pagination_arguments,
+            'introspection' in self._operation_policies,
+            sorted(
+                (operation, policy.max_aliases, policy.max_selections_per_level, policy.max_total_fields)
+                for operation, policy in self._operation_policies.items()
+            ),
+            sorted(self._field_sizes.items()) if self._field_sizes is not None else None,
+        )).encode()).hexdigest()
+
+    def get_schema_tables(self, schema: GraphQLSchema) -> SchemaTables:
+        tables = self._schema_tables.get(schema)
+        if tables is not None:
+            return tables
+
+        with self._schema_tables_lock:
+            tables = self._schema_tables.get(schema)
+            if tables is None:
+                tables = build_schema_tables(schema)
+                self._schema_tables[schema] = tables
+        return tables
+
+    def get_root_field_policies(self, schema: GraphQLSchema) -> t.Dict[str, t.Dict[str, LimitPolicy]]:
+        """
+        Returns root field policies resolved for the schema: operation type -> field name -> policy.
+        Policies are resolved once per schema, ValueError is raised on every execute
+        if a policy is set for a field that isn't a root field of the schema
+        """
+        if not self._root_field_policies:
+            return {}
+
+        resolved = self._resolved_root_field_policies.get(schema)
+        if isinstance(resolved, str):
+            raise ValueError(resolved)
+        if resolved is not None:
+            return resolved
+
+        tables = self.get_schema_tables(schema)
+        operations = {type_name: operation for operation, type_name in tables.root_types.items()}
+        resolved = {}
+        for path, policy in self._root_field_policies.items():
+            type_name, _, field_name = path.partition('.')
+            if type_name not in operations or field_name not in tables.root_fields[type_name]:
+                # the error is cached to not resolve policies again on every request
+                self._resolved_root_field_policies[schema] = f'{path} is not a root field of the schema'
+                raise ValueError(self._resolved_root_field_policies[schema])
+            resolved.setdefault(operations[type_name], {})[field_name] = policy
+
+        self._resolved_root_field_policies[schema] = resolved
+        return resolved
+
+    def _get_cache_key(self, document: GraphQLDocument) -> str:
+        settings = self._analysis_settings
+        if self._field_sizes is not None:
+            # sizes depend on field types
+            settings += self.get_schema_tables(document.schema).fingerprint
+        return f'{settings}:{document.document_string}'
 
     def document_from_string(
         self,
@@ -139,30 +288,87 @@ class ProtectorBackend(GraphQLCoreBackend):
         document_string: t.Union[Document, str]
     ) -> GraphQLDocument:
         document = super().document_from_string(schema, document_string)
-        ast = document.document_ast
-        # fragments are like a dictionary of views
-        fragments = get_fragments(ast.definitions)
+        # limits are checked on execute, because only there request variables are known
+        document.execute = partial(self._execute, document, document.execute)
+        return document
 
-        for definition in ast.definitions:
-            # only queries and mutations
-            if not isinstance(definition, OperationDefinition):
-                continue
+    def _execute(
+        self,
+        document: GraphQLDocument,
+        execute: t.Callable[..., t.Any],
+        *args: t.Any,
+        **kwargs: t.Any,
+    ) -> t.Any:
+        variable_values = _get_variable_values(args, kwargs)
+        if variable_values is None:
+            variable_values = self._variable_values
 
-            if self._nodes_limit:
-                fetched_nodes = get_count_of_fetched_nodes(
-                    definition,
-                    fragments,
-                    self._pagination_arguments,
-                    self._variable_values,
-                )
+        metrics = self._metrics
+        started = time.perf_counter() if metrics is not None else None
+        validation_seconds = None
+        try:
+            key = self._get_cache_key(document)
+            analysis = self._analysis_cache.get(key)
+            if metrics is not None:
+                metrics.observe_cache(analysis is not None)
 
-                if fetched_nodes > self._nodes_limit:
-                    raise NodesLimitReached('Operation fetches a lot of nodes')
+            errors = None
+            if analysis is None:
+                # standard validation and analysis share one traversal
+                validation_started = time.perf_counter()
+                try:
+                    analysis, errors = self._validate_and_analyze(document, kwargs.get('validate', True))
+                finally:
+                    validation_seconds = time.perf_counter() - validation_started
+                kwargs['validate'] = False
+                if not errors:
+                    self._analysis_cache.set(key, analysis)
 
-            if self._depth_limit:
-                max_depth = get_max_depth(definition, fragments)
+            # limits are reported before validation errors
+            check_analysis(
+                analysis,
+                variable_values,
+                self._operation_policies,
+                self.get_root_field_policies(document.schema),
+                metrics,
+            )
+            if errors:
+                return ExecutionResult(errors=errors, invalid=True)
+        finally:
+            if metrics is not None:
+                seconds = time.perf_counter() - started
+                if validation_seconds is not None:
+                    metrics.observe_validation(validation_seconds)
+                    seconds -= validation_seconds
+                metrics.observe_analysis(seconds)
 
-                if max_depth > self._depth_limit:
-                    raise DepthLimitReached('Query is too deep')
+        return execute(*args, **kwargs)
 
-        return document
+    def _validate_and_analyze(
+        self,
+        document: GraphQLDocument,
+        do_validation: bool,
+    ) -> t.Tuple[t.Tuple[OperationAnalysis, ...], t.List[t.Any]]:
+        results = []
+
+        class AnalysisRule(LimitsAnalysisRule):
+            pagination_arguments = self._pagination_arguments
+            measure_introspection = 'introspection' in self._operation_policies
+            operation_policies = self._operation_policies
+            field_sizes = self._field_sizes
+
+            def on_analysis(self, analysis: t.Tuple[OperationAnalysis, ...]) -> None:
+                results.append(analysis)
+
+            def on_limit_exceeded(self, analysis: t.Tuple[OperationAnalysis, ...]) -> None:
+                # the rest of validation is skipped, e.g. overlapping fields check is quadratic for alias bombs
+                results.append(analysis)
+                raise _AnalysisStopped
+
+        # analysis goes first to stop before other rules process a huge selection set
+        rules = [AnalysisRule, *specified_rules] if do_validation else [AnalysisRule]
+        try:
+            errors = validate(document.schema, document.document_ast, rules)
+        except _AnalysisStopped:
+            errors = []
+        return results[0], errors
@@ -0,0 +1,534 @@
+import typing as t
+
+from graphql import GraphQLList, get_named_type, get_nullable_type
+from graphql.language.visitor import BREAK
+from graphql.validation import validate
+
+try:
+    # graphql-core 3
+    from graphql.language import FieldNode as Field, IntValueNode as IntValue, VariableNode as Variable
+    from graphql.validation import ValidationRule
+except ImportError:
+    # graphql-core 2
+    from graphql.language.ast import Field, IntValue, Variable
+    from graphql.validation.rules.base import ValidationRule
+
+from .analysis import (
+    DEFAULT_FIELD_SIZE,
+    INTROSPECTION_FIELDS,
+    LimitPolicy,
+    NodesPlan,
+    OperationAnalysis,
+    RootFieldAnalysis,
+    check_analysis,
+    get_breadth_thresholds,
+    get_field_sizes,
+    get_key_size,
+    get_leaf_size_plan,
+    get_object_size_plan,
+    get_operation_policies,
+    get_selections_size_plan,
+)
+from .exceptions import (
+    AliasesLimitReached,
+    DepthLimitReached,
+    FieldsLimitReached,
+    NodesLimitReached,
+    ResponseSizeLimitReached,
+    SelectionsLimitReached,
+)
+
+
+class _FragmentRef(t.NamedTuple):
+    # spread of a fragment which may be defined later in the document
+    name: str
+
+
+class _Frame:
+    __slots__ = (
+        'multiplier', 'height', 'height_refs', 'constant', 'children', 'size_constant', 'size_children',
+        'fields', 'selections', 'selection_spreads',
+    )
+
+    def __init__(self, multiplier: t.Union[int, str] = 1):
+        self.multiplier = multiplier
+        # max height of selections, height of a spread is offset + height of the fragment
+        self.height = 0
+        self.height_refs: t.Dict[str, int] = {}
+        self.constant = 0
+        self.children: t.List[t.Any] = []
+        # sizes of selections without braces
+        self.size_constant = 0
+        self.size_children: t.List[t.Any] = []
+        # selected fields (name, height, height_refs, plan, size_plan) and spreads, inline fragments are flattened
+        self.fields: t.List[t.Any] = []
+        # size of the selection set, spreads are added when fragments are known
+        self.selections = 0
+        self.selection_spreads: t.List[str] = []
+
+    def add(self, height: int, height_refs: t.Dict[str, int], plan: t.Any, size_plan: t.Any = 0) -> None:
+        if height > self.height:
+            self.height = height
+        for name, offset in height_refs.items():
+            if offset > self.height_refs.get(name, -1):
+                self.height_refs[name] = offset
+        if isinstance(plan, int):
+            self.constant += plan
+        else:
+            self.children.append(plan)
+        if isinstance(size_plan, int):
+            self.size_constant += size_plan
+        else:
+            self.size_children.append(size_plan)
+
+    def get_size_plan(self) -> t.Any:
+        return get_selections_size_plan(self.size_constant, self.size_children)
+
+    def close(self) -> t.Tuple[int, t.Dict[str, int], t.Any]:
+        height_refs = {name: offset + 1 for name, offset in self.height_refs.items()}
+        if not self.children and isinstance(self.multiplier, int):
+            plan = (self.constant or 1) * self.multiplier
+        else:
+            plan = (self.multiplier, self.constant, tuple(self.children))
+        return self.height + 1, height_refs, plan
+
+
+class _Counts:
+    # breadth counts of an operation or a fragment definition without expanded fragments
+    __slots__ = ('aliases', 'fields', 'max_selections', 'spreads', 'pending_selections')
+
+    def __init__(self) -> None:
+        self.aliases = 0
+        self.fields = 0
+        self.max_selections = 0
+        # every spread in the definition
+        self.spreads: t.List[str] = []
+        # sizes of selection sets with spreads
+        self.pending_selections: t.List[t.Tuple[int, t.List[str]]] = []
+
+    def add_selection_set(self, frame: _Frame) -> None:
+        if frame.selection_spreads:
+            self.pending_selections.append((frame.selections, frame.selection_spreads))
+        elif frame.selections > self.max_selections:
+            self.max_selections = frame.selections
+
+
+class LimitsAnalysisRule(ValidationRule):
+    """
+    Builds the analysis of operations during the validation traversal,
+    so limits don't need a separate walk over the document.
+    Subclasses get the result in on_analysis when the document is left.
+    """
+    pagination_arguments: t.Iterable[str] = ('first', 'last')
+    # measure whole introspection operations instead of counting __schema as one node
+    measure_introspection = False
+    # analysis stops as soon as breadth of a definition is over every policy that can apply to it
+    operation_policies: t.Dict[str, LimitPolicy] = get_operation_policies(LimitPolicy(), None)
+    # estimated sizes of leaf values per type name, see get_field_sizes.
+    # Response size isn't measured if it's None
+    field_sizes: t.Optional[t.Dict[str, int]] = None
+
+    def __init__(self, context: t.Any):
+        super().__init__(context)
+        self._stack: t.List[_Frame] = []
+        self._operations: t.List[t.Tuple[str, t.List[t.Any], _Counts, t.Dict[str, int]]] = []
+        self._fragments: t.Dict[
+            str, t.Tuple[t.Tuple[int, t.Dict[str, int], t.Any, t.Any], t.List[t.Any], _Counts]
+        ] = {}
+        self._operation = 'query'
+        self._introspection: t.Optional[bool] = False
+        self._variable_defaults: t.Dict[str, int] = {}
+        self._thresholds = LimitPolicy()
+        self._counts = _Counts()
+
+    def on_analysis(self, analysis: t.Tuple[OperationAnalysis, ...]) -> None:
+        pass
+
+    def on_limit_exceeded(self, analysis: t.Tuple[OperationAnalysis, ...]) -> None:
+        """
+        Called instead of on_analysis when the traversal is stopped early,
+        the analysis has only breadth counts that are over the limits of the definition
+        """
+        self.on_analysis(analysis)
+
+    def enter_operation_definition(self, node: t.Any, *args: t.Any) -> None:
+        self._stack.append(_Frame())
+        # graphql-core 3 uses OperationType enum
+        self._operation = getattr(node.operation, 'value', node.operation)
+        self._counts = _Counts()
+        # pagination variables that aren't sent take their default values
+        self._variable_defaults = {
+            definition.variable.name.value: int(definition.default_value.value)
+            for definition in node.variable_definitions or ()
+            if isinstance(definition.default_value, IntValue)
+        }
+
+        # the introspection policy applies only to operations that select nothing else
+        self._introspection = True
+        for selection in node.selection_set.selections:
+            if not isinstance(selection, Field):
+                # fields of fragments are known later
+                self._introspection = None
+            elif selection.name.value not in INTROSPECTION_FIELDS:
+                self._introspection = False
+                break
+
+        policies = [self.operation_policies[self._operation]]
+        if 'introspection' in self.operation_policies and self._introspection is not False:
+            if self._introspection:
+                policies = []
+            policies.append(self.operation_policies['introspection'])
+        self._thresholds = get_breadth_thresholds(policies)
+
+    def leave_operation_definition(self, node: t.Any, *args: t.Any) -> None:
+        frame = self._stack.pop()
+        self._counts.add_selection_set(frame)
+        self._operations.append((self._operation, frame.fields, self._counts, self._variable_defaults))
+
+    def enter_fragment_definition(self, node: t.Any, *args: t.Any) -> None:
+        self._stack.append(_Frame())
+        self._operation = 'query'
+        self._introspection = False
+        self._variable_defaults = {}
+        # fragments can be spread in operations of any type
+        self._thresholds = get_breadth_thresholds(self.operation_policies.values())
+        self._counts = _Counts()
+
+    def leave_fragment_definition(self, node: t.Any, *args: t.Any) -> None:
+        frame = self._stack.pop()
+        # top selections of a fragment are merged into the selection set where it's spread
+        self._counts.pending_selections.append((frame.selections, frame.selection_spreads))
+        self._fragments[node.name.value] = ((*frame.close(), frame.get_size_plan()), frame.fields, self._counts)
+
+    def enter_selection_set(self, node: t.Any, *args: t.Any) -> t.Any:
+        counts = self._counts
+        for selection in node.selections:
+            if isinstance(selection, Field):
+                counts.fields += 1
+                if selection.alias:
+                    counts.aliases += 1
+
+        # counts of one definition are the lower bound of counts of any operation that uses it
+        thresholds = self._thresholds
+        if (
+            (thresholds.max_aliases is not None and counts.aliases > thresholds.max_aliases)
+            or (
+                thresholds.max_selections_per_level is not None
+                and len(node.selections) > thresholds.max_selections_per_level
+            )
+            or (thresholds.max_total_fields is not None and counts.fields > thresholds.max_total_fields)
+        ):
+            self.on_limit_exceeded((OperationAnalysis(
+                operation=self._operation,
+                introspection=bool(self._introspection),
+                root_fields=(),
+                aliases=counts.aliases,
+                max_selections=max(counts.max_selections, len(node.selections)),
+                total_fields=counts.fields,
+                variable_defaults=self._variable_defaults,
+            ),))
+            return BREAK
+        return None
+
+    def enter_inline_fragment(self, node: t.Any, *args: t.Any) -> None:
+        self._stack.append(_Frame())
+
+    def leave_inline_fragment(self, node: t.Any, *args: t.Any) -> None:
+        frame = self._stack.pop()
+        parent = self._stack[-1]
+        parent.add(*frame.close(), frame.get_size_plan())
+        parent.fields.extend(frame.fields)
+        parent.selections += frame.selections
+        parent.selection_spreads.extend(frame.selection_spreads)
+
+    def enter_fragment_spread(self, node: t.Any, *args: t.Any) -> None:
+        name = node.name.value
+        parent = self._stack[-1]
+        parent.add(0, {name: 0}, _FragmentRef(name), _FragmentRef(name) if self.field_sizes is not None else 0)
+        parent.fields.append(_FragmentRef(name))
+        parent.selection_spreads.append(name)
+        self._counts.spreads.append(name)
+
+    def enter_field(self, node: t.Any, *args: t.Any) -> None:
+        parent = self._stack[-1]
+        parent.selections += 1
+        if not node.selection_set:
+            # leaf node
+            size_plan = 0
+            if self.field_sizes is not None:
+                field_type = self.context.get_type()
+                leaf_type = get_named_type(field_type)
+                size_plan = get_leaf_size_plan(
+                    get_key_size((node.alias or node.name).value),
+                    # lists of scalars can be paginated too
+                    self._get_multiplier(node) if isinstance(get_nullable_type(field_type), GraphQLList) else 1,
+                    self.field_sizes.get(leaf_type.name if leaf_type else None, DEFAULT_FIELD_SIZE),
+                )
+            parent.add(1, {}, 0, size_plan)
+            parent.fields.append((node.name.value, 1, {}, 0, size_plan))
+            return
+
+        self._stack.append(_Frame(self._get_multiplier(node)))
+
+    def _get_multiplier(self, node: t.Any) -> t.Union[int, str]:
+        for argument in node.arguments or ():
+            if argument.name.value in self.pagination_arguments:
+                if isinstance(argument.value, Variable):
+                    return argument.value.name.value
+                if isinstance(argument.value, IntValue):
+                    return int(argument.value.value)
+                break
+        return 1
+
+    def leave_field(self, node: t.Any, *args: t.Any) -> None:
+        if not node.selection_set:
+            return
+
+        frame = self._stack.pop()
+        self._counts.add_selection_set(frame)
+        height, height_refs, plan = frame.close()
+        size_plan = 0
+        if self.field_sizes is not None:
+            size_plan = get_object_size_plan(
+                get_key_size((node.alias or node.name).value),
+                frame.multiplier,
+                frame.size_constant,
+                frame.size_children,
+            )
+        parent = self._stack[-1]
+        parent.add(height, height_refs, plan, size_plan)
+        parent.fields.append((node.name.value, height, height_refs, plan, size_plan))
+
+    def leave_document(self, node: t.Any, *args: t.Any) -> None:
+        self.on_analysis(self._get_analysis())
+
+    # graphql-core 2 finds handlers by AST class names
+    enter_OperationDefinition = enter_operation_definition
+    leave_OperationDefinition = leave_operation_definition
+    enter_FragmentDefinition = enter_fragment_definition
+    leave_FragmentDefinition = leave_fragment_definition
+    enter_InlineFragment = enter_inline_fragment
+    leave_InlineFragment = leave_inline_fragment
+    enter_FragmentSpread = enter_fragment_spread
+    enter_SelectionSet = enter_selection_set
+    enter_Field = enter_field
+    leave_Field = leave_field
+    leave_Document = leave_document
+
+    def _get_analysis(self) -> t.Tuple[OperationAnalysis, ...]:
+        fragment_heights: t.Dict[str, int] = {}
+        fragment_plans: t.Dict[str, NodesPlan] = {}
+        fragment_size_plans: t.Dict[str, NodesPlan] = {}
+
+        def resolve_height(height: int, height_refs: t.Dict[str, int]) -> int:
+            for name, offset in height_refs.items():
+                height = max(height, offset + fragment_height(name))
+            return height
+
+        def fragment_height(name: str) -> int:
+            if name not in fragment_heights:
+                # unknown fragments and cycles are reported by the standard rules
+                fragment_heights[name] = 0
+                if name in self._fragments:
+                    (height, height_refs, _, _), _, _ = self._fragments[name]
+                    fragment_heights[name] = resolve_height(height, height_refs)
+            return fragment_heights[name]
+
+        def resolve_plan(plan: t.Any, fragment_plan: t.Callable[[str], NodesPlan]) -> NodesPlan:
+            if isinstance(plan, int):
+                return plan
+            if isinstance(plan, _FragmentRef):
+                return fragment_plan(plan.name)
+
+            multiplier, constant, children = plan
+            dynamic = []
+            for child in children:
+                child = resolve_plan(child, fragment_plan)
+                if isinstance(child, int):
+                    constant += child
+                else:
+                    dynamic.append(child)
+
+            if not dynamic and isinstance(multiplier, int):
+                return (constant or 1) * multiplier
+            return multiplier, constant, tuple(dynamic)
+
+        def fragment_plan(name: str) -> NodesPlan:
+            if name not in fragment_plans:
+                fragment_plans[name] = 0
+                if name in self._fragments:
+                    (_, _, plan, _), _, _ = self._fragments[name]
+                    fragment_plans[name] = resolve_plan(plan, fragment_plan)
+            return fragment_plans[name]
+
+        def fragment_size_plan(name: str) -> NodesPlan:
+            if name not in fragment_size_plans:
+                fragment_size_plans[name] = 0
+                if name in self._fragments:
+                    (_, _, _, size_plan), _, _ = self._fragments[name]
+                    fragment_size_plans[name] = resolve_plan(size_plan, fragment_size_plan)
+            return fragment_size_plans[name]
+
+        fragment_breadths: t.Dict[str, t.Tuple[int, int, int, int]] = {}
+
+        def selections_with_spreads(selections: int, spreads: t.List[str]) -> int:
+            for name in spreads:
+                selections += fragment_breadth(name)[0]
+            return selections
+
+        def resolve_breadth(counts: _Counts) -> t.Tuple[int, int, int]:
+            aliases = counts.aliases
+            fields = counts.fields
+            max_selections = counts.max_selections
+            for name in counts.spreads:
+                _, spread_aliases, spread_max_selections, spread_fields = fragment_breadth(name)
+                aliases += spread_aliases
+                fields += spread_fields
+                max_selections = max(max_selections, spread_max_selections)
+            return aliases, max_selections, fields
+
+        def fragment_breadth(name: str) -> t.Tuple[int, int, int, int]:
+            # top selections, aliases, max selections, fields
+            if name not in fragment_breadths:
+                fragment_breadths[name] = (0, 0, 0, 0)
+                if name in self._fragments:
+                    _, _, counts = self._fragments[name]
+                    # the last pending set is the top of the fragment
+                    *pending, (top_selections, top_spreads) = counts.pending_selections
+                    top_selections = selections_with_spreads(top_selections, top_spreads)
+                    aliases, max_selections, fields = resolve_breadth(counts)
+                    for selections, spreads in pending:
+                        max_selections = max(max_selections, selections_with_spreads(selections, spreads))
+                    fragment_breadths[name] = (top_selections, aliases, max_selections, fields)
+            return fragment_breadths[name]
+
+        def get_root_fields(fields: t.List[t.Any], spread: t.FrozenSet[str]) -> t.Iterator[t.Any]:
+            for field in fields:
+                if not isinstance(field, _FragmentRef):
+                    yield field
+                elif field.name in self._fragments and field.name not in spread:
+                    yield from get_root_fields(self._fragments[field.name][1], spread | {field.name})
+
+        analysis = []
+        for operation, fields, counts, variable_defaults in self._operations:
+            aliases, max_selections, total_fields = resolve_breadth(counts)
+            for selections, spreads in counts.pending_selections:
+                max_selections = max(max_selections, selections_with_spreads(selections, spreads))
+            root_fields = list(get_root_fields(fields, frozenset()))
+            introspection = all(name in INTROSPECTION_FIELDS for name, *_ in root_fields)
+            ignore_introspection = not (introspection and self.measure_introspection)
+            analysis.append(OperationAnalysis(
+                operation=operation,
+                introspection=introspection,
+                root_fields=tuple(
+                    RootFieldAnalysis(name, 2, 1, 0)
+                    if ignore_introspection and name == '__schema' else
+                    RootFieldAnalysis(
+                        name,
+                        1 + resolve_height(height, height_refs),
+                        resolve_plan(plan, fragment_plan),
+                        resolve_plan(size_plan, fragment_size_plan),
+                    )
+                    for name, height, height_refs, plan, size_plan in root_fields
+                ),
+                aliases=aliases,
+                max_selections=max_selections,
+                total_fields=total_fields,
+                variable_defaults=variable_defaults,
+            ))
+
+        return tuple(analysis)
+
+
+class LimitsRule(LimitsAnalysisRule):
+    variable_values: t.Dict[str, t.Any] = {}
+
+    def on_analysis(self, analysis: t.Tuple[OperationAnalysis, ...]) -> None:
+        try:
+            check_analysis(analysis, self.variable_values, self.operation_policies, {})
+        except (
+            AliasesLimitReached,
+            DepthLimitReached,
+            FieldsLimitReached,
+            NodesLimitReached,
+            ResponseSizeLimitReached,
+            SelectionsLimitReached,
+        ) as error:
+            self.context.report_error(error)
+
+
+def limits_rule(
+    depth_limit: int = None,
+    nodes_limit: int = None,
+    max_aliases: int = None,
+    max_selections_per_level: int = None,
+    max_total_fields: int = None,
+    max_response_bytes: int = None,
+    field_sizes: t.Dict[str, int] = None,
+    pagination_arguments: t.Iterable[str] = ('first', 'last'),
+    variable_values: t.Dict[str, t.Any] = None,
+    operation_policies: t.Dict[str, LimitPolicy] = None,
+) -> t.Type[ValidationRule]:
+    """
+    Validation rule that checks limits in the same traversal as the standard rules:
+        validate(schema, document, specified_rules + [limits_rule(depth_limit=5)])
+    Works with graphql-core 2 and 3, arguments are the same as for ProtectorBackend.
+
+    variable_values - variables of the request, the rule has to be created per request if they are used
+    """
+    rule_pagination_arguments = tuple(pagination_arguments)
+    rule_variable_values = variable_values or {}
+    rule_operation_policies = get_operation_policies(
+        LimitPolicy(
+            depth_limit,
+            nodes_limit,
+            max_aliases,
+            max_selections_per_level,
+            max_total_fields,
+            max_response_bytes,
+        ),
+        operation_policies,
+    )
+    rule_field_sizes = None
+    if any(policy.max_response_bytes is not None for policy in rule_operation_policies.values()):
+        rule_field_sizes = get_field_sizes(field_sizes)
+
+    class ConfiguredLimitsRule(LimitsRule):
+        pagination_arguments = rule_pagination_arguments
+        measure_introspection = 'introspection' in rule_operation_policies
+        field_sizes = rule_field_sizes
+        variable_values = rule_variable_values
+        operation_policies = rule_operation_policies
+
+    return ConfiguredLimitsRule
+
+
+def analyze_document(
+    schema: t.Any,
+    document_ast: t.Any,
+    pagination_arguments: t.Iterable[str] = ('first', 'last'),
+    measure_introspection: bool = False,
+    field_sizes: t.Dict[str, int] = None,
+) -> t.Tuple[OperationAnalysis, ...]:
+    """
+    Runs LimitsAnalysisRule alone and returns the analysis of every operation of the document
+
+    measure_introspection - measure whole introspection operations instead of counting __schema as one node
+    field_sizes - estimate response size with these sizes of leaf values, see get_field_sizes.
+        Default: None, the size isn't measured
+    """
+    results = []
+    rule_pagination_arguments = tuple(pagination_arguments)
+    rule_measure_introspection = measure_introspection
+    rule_field_sizes = get_field_sizes(field_sizes) if field_sizes is not None else None
+
+    class AnalysisRule(LimitsAnalysisRule):
+        pagination_arguments = rule_pagination_arguments
+        measure_introspection = rule_measure_introspection
+        field_sizes = rule_field_sizes
+
+        def on_analysis(self, analysis: t.Tuple[OperationAnalysis, ...]) -> None:
+            results.append(analysis)
+
+    validate(schema, document_ast, [AnalysisRule])
+    return results[0]
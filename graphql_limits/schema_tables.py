@@ -0,0 +1,41 @@
+import typing as t
+from hashlib import sha1
+
+if t.TYPE_CHECKING:
+    from graphql import GraphQLSchema
+
+
+class SchemaTables(t.NamedTuple):
+    fingerprint: str
+    # operation type ('query', 'mutation', 'subscription') -> root type name
+    root_types: t.Dict[str, str]
+    # root type name -> names of its fields
+    root_fields: t.Dict[str, t.Tuple[str, ...]]
+
+
+def get_schema_fingerprint(schema: 'GraphQLSchema') -> str:
+    from graphql import print_schema
+
+    return sha1(print_schema(schema).encode()).hexdigest()
+
+
+def build_schema_tables(schema: 'GraphQLSchema') -> SchemaTables:
+    """
+    Precomputes per-schema metadata that root field policies are resolved with
+    """
+    root_types = {
+        operation: root_type
+        for operation, root_type in (
+            ('query', schema.get_query_type()),
+            ('mutation', schema.get_mutation_type()),
+            ('subscription', schema.get_subscription_type()),
+        )
+        if root_type is not None
+    }
+
+    return SchemaTables(
+        fingerprint=get_schema_fingerprint(schema),
+        root_types={operation: root_type.name for operation, root_type in root_types.items()},
+        root_fields={root_type.name: tuple(root_type.fields) for root_type in root_types.values()},
+    )
+
@@ -17,7 +17,7 @@ DESCRIPTION = 'Graphql backend that assists you in securing your GraphQL API aga
 URL = 'https://github.com/shafa-dev/graphql-limits'
 EMAIL = 'zaseka.bogdan@gmail.com'
 AUTHOR = 'Bogdan Zaseka'
-REQUIRES_PYTHON = '>=3.6.0'
+REQUIRES_PYTHON = '>=3.7.0'
 VERSION = '0.1.1'
 
 # What packages are required for this module to be executed?
@@ -120,7 +120,7 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: Implementation :: CPython',
         'Programming Language :: Python :: Implementation :: PyPy'
     ],
@@ -0,0 +1,154 @@
+from unittest import TestCase, mock
+
+import graphene
+from graphql.validation.rules.base import ValidationRule
+
+from graphql_limits import (
+    ProtectorBackend,
+    AliasesLimitReached,
+    FieldsLimitReached,
+    LimitPolicy,
+    LimitsMetrics,
+    SelectionsLimitReached,
+)
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    books = graphene.List(
+        lambda: Book,
+        first=graphene.Int()
+    )
+
+    def resolve_id(self, *args):
+        return 1
+
+    def resolve_books(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    author = graphene.Field(User)
+
+    def resolve_author(self, *args):
+        return {'id': 1}
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+
+def alias_bomb(aliases):
+    return '{ viewer { ' + ' '.join(f'a{i}: books(first: 100) {{ title }}' for i in range(aliases)) + ' } }'
+
+
+class TestBreadthLimits(TestCase):
+    def setUp(self):
+        self.schema = graphene.Schema(query=Query)
+
+    def test_aliases_limit(self):
+        backend = ProtectorBackend(max_aliases=10)
+
+        result = self.schema.execute(alias_bomb(10), backend=backend)
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(alias_bomb(11), backend=backend)
+        self.assertIsInstance(result.errors[0], AliasesLimitReached)
+
+    def test_aliases_in_fragments(self):
+        query_string = '''
+            { viewer { ...books } second: viewer { ...books } }
+            fragment books on User { a: books { title } b: books { title } }
+        '''
+        result = self.schema.execute(query_string, backend=ProtectorBackend(max_aliases=5))
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(query_string, backend=ProtectorBackend(max_aliases=4))
+        self.assertIsInstance(result.errors[0], AliasesLimitReached)
+
+    def test_selections_per_level_limit(self):
+        query_string = '''
+            { viewer { id ...books ... on User { id } } }
+            fragment books on User { books { title } second: books { title } }
+        '''
+        result = self.schema.execute(query_string, backend=ProtectorBackend(max_selections_per_level=4))
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(query_string, backend=ProtectorBackend(max_selections_per_level=3))
+        self.assertIsInstance(result.errors[0], SelectionsLimitReached)
+
+    def test_total_fields_limit(self):
+        query_string = '{ viewer { id books { title author { id } } } }'
+        result = self.schema.execute(query_string, backend=ProtectorBackend(max_total_fields=6))
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(query_string, backend=ProtectorBackend(max_total_fields=5))
+        self.assertIsInstance(result.errors[0], FieldsLimitReached)
+
+    def test_operation_policy(self):
+        backend = ProtectorBackend(
+            max_aliases=1,
+            operation_policies={'query': LimitPolicy(max_aliases=100)},
+        )
+        result = self.schema.execute(alias_bomb(50), backend=backend)
+
+        self.assertIsNone(result.errors)
+
+    def test_early_termination(self):
+        calls = []
+
+        class SpyRule(ValidationRule):
+            def enter_SelectionSet(self, *args):
+                calls.append(args)
+
+        metrics = LimitsMetrics()
+        backend = ProtectorBackend(max_aliases=100, metrics=metrics)
+        with mock.patch('graphql_limits.query_limit.specified_rules', [SpyRule]):
+            result = self.schema.execute(alias_bomb(500), backend=backend)
+            self.assertIsInstance(result.errors[0], AliasesLimitReached)
+            # viewer selection set is over the limit, other rules don't see it
+            self.assertEqual(len(calls), 1)
+
+            # the verdict is cached
+            result = self.schema.execute(alias_bomb(500), backend=backend)
+            self.assertIsInstance(result.errors[0], AliasesLimitReached)
+            self.assertEqual(len(calls), 1)
+
+        self.assertEqual(metrics.rejections, {'aliases': 2})
+
+    def test_early_termination_with_policies_without_breadth_limits(self):
+        calls = []
+
+        class SpyRule(ValidationRule):
+            def enter_SelectionSet(self, *args):
+                calls.append(args)
+
+        backend = ProtectorBackend(
+            max_aliases=100,
+            operation_policies={
+                'mutation': LimitPolicy(depth_limit=3),
+                'introspection': LimitPolicy(depth_limit=15),
+            },
+        )
+        with mock.patch('graphql_limits.query_limit.specified_rules', [SpyRule]):
+            result = self.schema.execute(alias_bomb(500), backend=backend)
+            self.assertIsInstance(result.errors[0], AliasesLimitReached)
+            self.assertEqual(len(calls), 1)
+
+    def test_introspection_policy_without_breadth_limits(self):
+        aliases = ' '.join(f'a{i}: __typename' for i in range(20))
+        query_string = '{ ' + aliases + ' }'
+        backend = ProtectorBackend(
+            max_aliases=10,
+            operation_policies={'introspection': LimitPolicy(depth_limit=15)},
+        )
+        result = self.schema.execute(query_string, backend=backend)
+        self.assertIsNone(result.errors)
+
+        # not an introspection operation
+        result = self.schema.execute('{ viewer { id } ' + aliases + ' }', backend=backend)
+        self.assertIsInstance(result.errors[0], AliasesLimitReached)
@@ -1,10 +1,12 @@
 from unittest import TestCase
 
 import graphene
+from graphql import parse
 from graphql_limits import (
     ProtectorBackend,
     DepthLimitReached,
 )
+from graphql_limits.query_limit import get_max_depth
 
 
 class User(graphene.ObjectType):
@@ -233,3 +235,16 @@ class TestDepthLimit(TestCase):
         result = schema.execute(query_string, backend=ProtectorBackend(depth_limit=5, variable_values={}))
 
         self.assertIsNone(result.errors)
+
+    def test_siblings_dont_add_depth(self):
+        # operation, viewer, book, author, id; the sibling leaf id used to be counted as one more level
+        query_string = '{ viewer { id book { author { id } } } }'
+        schema = graphene.Schema(query=Query)
+
+        self.assertEqual(get_max_depth(parse(query_string).definitions[0], {}), 5)
+
+        result = schema.execute(query_string, backend=ProtectorBackend(depth_limit=5, variable_values={}))
+        self.assertIsNone(result.errors)
+
+        result = schema.execute(query_string, backend=ProtectorBackend(depth_limit=4, variable_values={}))
+        self.assertIsInstance(result.errors[0], DepthLimitReached)
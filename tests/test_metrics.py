@@ -0,0 +1,106 @@
+from unittest import TestCase
+
+import graphene
+from graphql_limits import (
+    ProtectorBackend,
+    DepthLimitReached,
+    LimitsMetrics,
+    format_prometheus,
+)
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    book = graphene.Field('tests.test_metrics.Book')
+
+    def resolve_id(self, *args):
+        return 1
+
+    def resolve_book(self, *args):
+        return {'title': 'QQ'}
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    author = graphene.Field(User)
+
+    def resolve_author(self, *args):
+        return {'id': 1}
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+
+class TestMetrics(TestCase):
+    def test_metrics_of_accepted_query(self):
+        query_string = '''
+            query {
+                viewer {
+                   book {
+                        author {
+                            id
+                        }
+                   }
+                }
+            }
+        '''
+        metrics = LimitsMetrics()
+        schema = graphene.Schema(query=Query)
+        backend = ProtectorBackend(depth_limit=10, nodes_limit=10, variable_values={}, metrics=metrics)
+        result = schema.execute(query_string, backend=backend)
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(metrics.operations, 1)
+        self.assertEqual(metrics.analysis_seconds.count, 1)
+        self.assertEqual(metrics.depth.sum, 5)
+        self.assertEqual(metrics.nodes.sum, 1)
+        self.assertEqual(metrics.rejections, {})
+
+    def test_metrics_of_rejected_query(self):
+        query_string = '''
+            query {
+                viewer {
+                   book {
+                        author {
+                            id
+                        }
+                   }
+                }
+            }
+        '''
+        metrics = LimitsMetrics()
+        schema = graphene.Schema(query=Query)
+        backend = ProtectorBackend(depth_limit=2, variable_values={}, metrics=metrics)
+        for _ in range(3):
+            result = schema.execute(query_string, backend=backend)
+            self.assertIsInstance(result.errors[0], DepthLimitReached)
+
+        self.assertEqual(metrics.rejections, {'depth': 3})
+        self.assertEqual(metrics.analysis_seconds.count, 3)
+        # the document is validated once, then its analysis is cached
+        self.assertEqual(metrics.validation_seconds.count, 1)
+        # nodes limit is not configured so nodes are not measured
+        self.assertEqual(metrics.nodes.count, 0)
+
+    def test_format_prometheus(self):
+        metrics = LimitsMetrics(depth_buckets=(1, 5), nodes_buckets=(10,))
+        metrics.observe_operation(3, 20)
+        metrics.observe_operation(1, 5)
+        metrics.observe_rejection('nodes')
+
+        text = format_prometheus(metrics)
+
+        self.assertIn('# TYPE graphql_limits_operation_depth histogram', text)
+        self.assertIn('graphql_limits_operation_depth_bucket{le="1.0"} 1', text)
+        self.assertIn('graphql_limits_operation_depth_bucket{le="5.0"} 2', text)
+        self.assertIn('graphql_limits_operation_depth_bucket{le="+Inf"} 2', text)
+        self.assertIn('graphql_limits_operation_depth_sum 4', text)
+        self.assertIn('graphql_limits_operation_nodes_bucket{le="10.0"} 1', text)
+        self.assertIn('graphql_limits_operation_nodes_bucket{le="+Inf"} 2', text)
+        self.assertIn('graphql_limits_operations_total 2', text)
+        self.assertIn('graphql_limits_rejections_total{reason="nodes"} 1', text)
+        self.assertIn('# TYPE graphql_limits_validation_seconds histogram', text)
@@ -0,0 +1,191 @@
+import os
+import tempfile
+import threading
+import time
+from multiprocessing import get_context
+from unittest import TestCase
+
+import graphene
+
+from graphql_limits import mmap_cache
+from graphql_limits import (
+    ProtectorBackend,
+    NodesLimitReached,
+    LimitsMetrics,
+    MmapAnalysisCache,
+)
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    books = graphene.List(
+        lambda: Book,
+        first=graphene.Int()
+    )
+
+    def resolve_id(self, *args):
+        return 1
+
+    def resolve_books(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    author = graphene.Field(User)
+
+    def resolve_author(self, *args):
+        return {'id': 1}
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+
+QUERY = '''
+    query Test($first: Int) {
+        viewer {
+           books(first: $first) {
+                author {
+                    books(first: 4) {
+                        title
+                    }
+                }
+           }
+        }
+    }
+'''
+
+
+def _warm_cache(path):
+    cache = MmapAnalysisCache(path, slots=16)
+    cache.set('query', [[3, ['first', 0, [4]]]])
+    cache.close()
+
+
+def _set_query(path, key):
+    cache = MmapAnalysisCache(path, slots=16)
+    cache.set(key, [[1, 1]])
+    cache.close()
+
+
+class TestMmapCache(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'analysis.cache')
+
+    def test_shared_between_processes(self):
+        process = get_context('fork').Process(target=_warm_cache, args=(self.path,))
+        process.start()
+        process.join()
+
+        cache = MmapAnalysisCache(self.path, slots=16)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.get('query'), [[3, ['first', 0, [4]]]])
+        self.assertIsNone(cache.get('another query'))
+
+    def test_replaced_by_processes_concurrently(self):
+        cache = MmapAnalysisCache(self.path, slots=64)
+        self.addCleanup(cache.close)
+        processes = [
+            get_context('fork').Process(target=_set_query, args=(self.path, f'query {i}'))
+            for i in range(4)
+        ]
+        # every process waits for the lock of the file with another size and then replaces it
+        with mmap_cache._process_lock, mmap_cache._file_lock(cache._file):
+            for process in processes:
+                process.start()
+            time.sleep(0.2)
+        for process in processes:
+            process.join()
+
+        other_cache = MmapAnalysisCache(self.path, slots=16)
+        self.addCleanup(other_cache.close)
+        for i in range(4):
+            self.assertEqual(other_cache.get(f'query {i}'), [[1, 1]])
+
+    def test_writes_of_threads_and_forked_processes_are_serialized(self):
+        cache = MmapAnalysisCache(self.path, slots=16)
+        self.addCleanup(cache.close)
+        # e.g. workers forked after the application is loaded, they share the open file with the parent
+        process = get_context('fork').Process(target=cache.set, args=('query', [[1, 1]]))
+        thread = threading.Thread(target=cache.set, args=('other query', [[2, 1]]))
+
+        with mmap_cache._process_lock, mmap_cache._file_lock(cache._file):
+            process.start()
+            thread.start()
+            process.join(0.2)
+            thread.join(0.2)
+            self.assertTrue(process.is_alive())
+            self.assertTrue(thread.is_alive())
+        process.join()
+        thread.join()
+
+        self.assertEqual(cache.get('query'), [[1, 1]])
+        self.assertEqual(cache.get('other query'), [[2, 1]])
+
+    def test_bounded_size(self):
+        cache = MmapAnalysisCache(self.path, slots=4, slot_size=64, probes=2)
+        self.addCleanup(cache.close)
+        for i in range(100):
+            cache.set(f'query {i}', [[i, 1]])
+        # too big for a slot
+        cache.set('big query', [[1, 1]] * 100)
+
+        self.assertEqual(os.path.getsize(self.path), 16 + 4 * 64)
+        self.assertEqual(cache.get('query 99'), [[99, 1]])
+        self.assertIsNone(cache.get('big query'))
+
+    def test_backend_with_mmap_cache(self):
+        schema = graphene.Schema(query=Query)
+        cache = MmapAnalysisCache(self.path)
+        self.addCleanup(cache.close)
+        metrics = LimitsMetrics()
+        backend = ProtectorBackend(nodes_limit=100, analysis_cache=cache, metrics=metrics)
+        # another worker process with the same cache file
+        other_cache = MmapAnalysisCache(self.path)
+        self.addCleanup(other_cache.close)
+        other_backend = ProtectorBackend(nodes_limit=100, analysis_cache=other_cache, metrics=metrics)
+
+        result = schema.execute(QUERY, backend=backend, variable_values={'first': 2})
+        self.assertIsNone(result.errors)
+
+        result = schema.execute(QUERY, backend=other_backend, variable_values={'first': 50})
+        self.assertIsInstance(result.errors[0], NodesLimitReached)
+        self.assertEqual((metrics.cache_hits, metrics.cache_misses), (1, 1))
+
+    def test_reopened_with_other_size(self):
+        cache = MmapAnalysisCache(self.path, slots=64)
+        self.addCleanup(cache.close)
+        cache.set('query', [[1, 1]])
+
+        # e.g. a new release during a rolling deploy, the mapped file must not be resized
+        other_cache = MmapAnalysisCache(self.path, slots=16)
+        self.addCleanup(other_cache.close)
+        other_cache.set('other query', [[2, 1]])
+
+        self.assertEqual(cache.get('query'), [[1, 1]])
+        self.assertIsNone(other_cache.get('query'))
+        self.assertEqual(os.path.getsize(self.path), 16 + 16 * 512)
+
+        reopened_cache = MmapAnalysisCache(self.path, slots=16)
+        self.addCleanup(reopened_cache.close)
+        self.assertEqual(reopened_cache.get('other query'), [[2, 1]])
+
+    def test_backends_with_other_settings(self):
+        schema = graphene.Schema(query=Query)
+        cache = MmapAnalysisCache(self.path)
+        self.addCleanup(cache.close)
+        # 'first' isn't a pagination argument of this backend
+        backend = ProtectorBackend(nodes_limit=100, pagination_arguments=('last',), analysis_cache=cache)
+        other_backend = ProtectorBackend(nodes_limit=100, analysis_cache=cache)
+
+        result = schema.execute(QUERY, backend=backend, variable_values={'first': 50})
+        self.assertIsNone(result.errors)
+
+        result = schema.execute(QUERY, backend=other_backend, variable_values={'first': 50})
+        self.assertIsInstance(result.errors[0], NodesLimitReached)
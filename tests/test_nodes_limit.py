@@ -122,6 +122,34 @@ class TestNodesLimit(TestCase):
         )
         self.assertIsNone(result.errors)
 
+    def test_variables_passed_to_document_execute(self):
+        query_string = 'query Q($first: Int) { viewer { books(first: $first) { title } } }'
+        schema = graphene.Schema(query=Query)
+        backend = ProtectorBackend(nodes_limit=10)
+        document = backend.document_from_string(schema, query_string)
+
+        self.assertIsNone(document.execute(variable_values={'first': 5}).errors)
+        # deprecated alias and positional arguments of execute
+        with self.assertRaises(NodesLimitReached):
+            document.execute(variables={'first': 5_000})
+        with self.assertRaises(NodesLimitReached):
+            document.execute(None, None, {'first': 5_000})
+
+    def test_variable_default_values(self):
+        query_string = 'query Q($first: Int = 50) { viewer { books(first: $first) { title } } }'
+        schema = graphene.Schema(query=Query)
+        backend = ProtectorBackend(nodes_limit=10)
+
+        result = schema.execute(query_string, backend=backend)
+        self.assertIsInstance(result.errors[0], NodesLimitReached)
+
+        result = schema.execute(query_string, backend=backend, variable_values={'first': 5})
+        self.assertIsNone(result.errors)
+
+        # a variable without a default value paginates nothing when it isn't sent
+        result = schema.execute('query Q($first: Int) { viewer { books(first: $first) { title } } }', backend=backend)
+        self.assertIsNone(result.errors)
+
     def test_with_several_queries(self):
         query_string = (
             'query Q {' +
@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+import graphene
+from graphql import parse
+
+from graphql_limits import (
+    analyze_document,
+    evaluate_nodes_plan,
+)
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    books = graphene.List(
+        lambda: Book,
+        first=graphene.Int()
+    )
+
+    def resolve_id(self, *args):
+        return 1
+
+    def resolve_books(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    author = graphene.Field(User)
+
+    def resolve_author(self, *args):
+        return {'id': 1}
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+
+QUERY = '''
+    query Test($first: Int, $second: Int) {
+        viewer {
+           books(first: $first) {
+                author {
+                    books(first: 4) {
+                        title
+                    }
+                    books2: books(first: $second) {
+                        title
+                    }
+                }
+           }
+        }
+    }
+'''
+
+
+class TestNodesPlan(TestCase):
+    def test_nodes_plan(self):
+        schema = graphene.Schema(query=Query)
+        analysis = analyze_document(schema, parse(QUERY), ['first'])
+        (_, _, plan, _), = analysis[0].root_fields
+
+        for variable_values in ({'first': 1, 'second': 1}, {'first': 10, 'second': 0}, {'first': 3, 'second': 7}):
+            # books(first: $first) { author { books(first: 4) books2: books(first: $second) } }
+            self.assertEqual(
+                evaluate_nodes_plan(plan, variable_values),
+                variable_values['first'] * (4 + variable_values['second']),
+            )
@@ -0,0 +1,164 @@
+from unittest import TestCase, mock
+
+import graphene
+
+from graphql_limits import (
+    ProtectorBackend,
+    DepthLimitReached,
+    NodesLimitReached,
+    LimitPolicy,
+    LocalAnalysisCache,
+    ResponseSizeLimitReached,
+)
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    books = graphene.List(
+        lambda: Book,
+        first=graphene.Int()
+    )
+
+    def resolve_id(self, *args):
+        return 1
+
+    def resolve_books(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    author = graphene.Field(User)
+
+    def resolve_author(self, *args):
+        return {'id': 1}
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+    search = graphene.List(Book, first=graphene.Int())
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+    def resolve_search(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class CreateBook(graphene.Mutation):
+    book = graphene.Field(Book)
+
+    def mutate(self, info):
+        return CreateBook(book={'title': 'QQ'})
+
+
+class Mutation(graphene.ObjectType):
+    create_book = CreateBook.Field()
+
+
+class TestPolicies(TestCase):
+    def setUp(self):
+        self.schema = graphene.Schema(query=Query, mutation=Mutation)
+
+    def test_operation_policies(self):
+        backend = ProtectorBackend(
+            depth_limit=10,
+            operation_policies={'mutation': LimitPolicy(depth_limit=3)},
+        )
+        query_string = '{ viewer { books { author { id } } } }'
+        mutation_string = 'mutation { createBook { book { author { id } } } }'
+
+        result = self.schema.execute(query_string, backend=backend)
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(mutation_string, backend=backend)
+        self.assertIsInstance(result.errors[0], DepthLimitReached)
+
+    def test_root_field_policies(self):
+        backend = ProtectorBackend(
+            nodes_limit=1_000,
+            root_field_policies={'Query.search': LimitPolicy(nodes_limit=10)},
+        )
+        query_string = '''
+            query Q($first: Int) {
+                search(first: $first) { title }
+                viewer { books(first: 100) { title } }
+            }
+        '''
+
+        result = self.schema.execute(query_string, backend=backend, variable_values={'first': 5})
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(query_string, backend=backend, variable_values={'first': 50})
+        self.assertIsInstance(result.errors[0], NodesLimitReached)
+        self.assertEqual(str(result.errors[0]), 'Field search fetches a lot of nodes')
+
+    def test_unknown_root_field(self):
+        backend = ProtectorBackend(root_field_policies={'Query.books': LimitPolicy(nodes_limit=10)})
+
+        with mock.patch.object(backend, 'get_schema_tables', wraps=backend.get_schema_tables) as get_schema_tables:
+            for _ in range(3):
+                with self.assertRaises(ValueError):
+                    backend.get_root_field_policies(self.schema)
+        # policies are resolved only once
+        self.assertEqual(get_schema_tables.call_count, 1)
+
+    def test_zero_limits(self):
+        query_string = '{ viewer { books(first: 1) { title } } }'
+        for policy, error in (
+            (LimitPolicy(depth_limit=0), DepthLimitReached),
+            (LimitPolicy(nodes_limit=0), NodesLimitReached),
+            (LimitPolicy(max_response_bytes=0), ResponseSizeLimitReached),
+            (LimitPolicy(max_aliases=0), None),
+        ):
+            backend = ProtectorBackend(operation_policies={'query': policy})
+            result = self.schema.execute(query_string, backend=backend)
+            if error is None:
+                self.assertIsNone(result.errors)
+            else:
+                self.assertIsInstance(result.errors[0], error)
+
+    def test_introspection_policy(self):
+        query_string = '''
+            query IntrospectionQuery {
+                __schema {
+                    types {
+                        fields {
+                            type { ofType { ofType { name } } }
+                        }
+                    }
+                }
+            }
+        '''
+        result = self.schema.execute(query_string, backend=ProtectorBackend(depth_limit=3))
+        self.assertIsNone(result.errors)
+
+        backend = ProtectorBackend(
+            depth_limit=3,
+            operation_policies={'introspection': LimitPolicy(depth_limit=5)},
+        )
+        result = self.schema.execute(query_string, backend=backend)
+        self.assertIsInstance(result.errors[0], DepthLimitReached)
+
+        backend = ProtectorBackend(
+            depth_limit=3,
+            operation_policies={'introspection': LimitPolicy(depth_limit=10)},
+        )
+        result = self.schema.execute(query_string, backend=backend)
+        self.assertIsNone(result.errors)
+
+    def test_cache_shared_with_backend_without_introspection_policy(self):
+        query_string = '{ __schema { types { fields { type { name } } } } }'
+        cache = LocalAnalysisCache()
+        backend = ProtectorBackend(depth_limit=3, analysis_cache=cache)
+        introspection_backend = ProtectorBackend(
+            depth_limit=3,
+            operation_policies={'introspection': LimitPolicy(depth_limit=4)},
+            analysis_cache=cache,
+        )
+
+        result = self.schema.execute(query_string, backend=backend)
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(query_string, backend=introspection_backend)
+        self.assertIsInstance(result.errors[0], DepthLimitReached)
@@ -0,0 +1,178 @@
+from unittest import TestCase
+
+import graphene
+from graphql import parse
+
+from graphql_limits import (
+    ProtectorBackend,
+    DEFAULT_FIELD_SIZES,
+    LocalAnalysisCache,
+    LimitPolicy,
+    LimitsMetrics,
+    NodesLimitReached,
+    ResponseSizeLimitReached,
+    analyze_document,
+    get_count_of_fetched_nodes,
+    get_response_size,
+)
+from graphql_limits.query_limit import get_fragments
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    name = graphene.String()
+    books = graphene.List(
+        lambda: Book,
+        first=graphene.Int()
+    )
+    tags = graphene.List(graphene.String, first=graphene.Int())
+
+    def resolve_id(self, *args):
+        return 1
+
+    def resolve_name(self, *args):
+        return 'QQ'
+
+    def resolve_tags(self, *args, **kwargs):
+        return ['QQ']
+
+    def resolve_books(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    description = graphene.String()
+    pages = graphene.Int()
+    author = graphene.Field(User)
+
+    def resolve_author(self, *args):
+        return {'id': 1}
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+
+LIGHT_QUERY = 'query Q($first: Int) { viewer { books(first: $first) { pages } } }'
+HEAVY_QUERY = '''
+    query Q($first: Int) {
+        viewer {
+            books(first: $first) {
+                title
+                description
+                pages
+                ...author
+            }
+        }
+    }
+    fragment author on Book { author { id name } }
+'''
+
+
+class TestResponseSize(TestCase):
+    def setUp(self):
+        self.schema = graphene.Schema(query=Query)
+
+    def test_get_response_size(self):
+        document_ast = parse(LIGHT_QUERY)
+
+        analysis = analyze_document(self.schema, document_ast, ['first'], field_sizes={})
+        # "viewer":{"books":[{"pages":11 digits,}]}
+        self.assertEqual(get_response_size(analysis[0], {'first': 10}), 10 + 2 + 9 + 10 * (2 + 9 + 11))
+
+        analysis = analyze_document(self.schema, document_ast, ['first'], field_sizes={'Int': 1})
+        self.assertEqual(get_response_size(analysis[0], {'first': 10}), 10 + 2 + 9 + 10 * (2 + 9 + 1))
+
+    def test_heavy_fields_with_same_count_of_nodes(self):
+        variable_values = {'first': 100}
+        for query_string in (LIGHT_QUERY, HEAVY_QUERY):
+            document_ast = parse(query_string)
+            self.assertEqual(
+                get_count_of_fetched_nodes(
+                    document_ast.definitions[0],
+                    get_fragments(document_ast.definitions),
+                    ['first'],
+                    variable_values,
+                ),
+                100,
+            )
+
+        backend = ProtectorBackend(max_response_bytes=10_000)
+        result = self.schema.execute(LIGHT_QUERY, backend=backend, variable_values=variable_values)
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(HEAVY_QUERY, backend=backend, variable_values=variable_values)
+        self.assertIsInstance(result.errors[0], ResponseSizeLimitReached)
+
+    def test_size_depends_on_variables(self):
+        metrics = LimitsMetrics()
+        backend = ProtectorBackend(nodes_limit=1_000, max_response_bytes=10_000, metrics=metrics)
+
+        result = self.schema.execute(HEAVY_QUERY, backend=backend, variable_values={'first': 10})
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(HEAVY_QUERY, backend=backend, variable_values={'first': 500})
+        self.assertIsInstance(result.errors[0], ResponseSizeLimitReached)
+
+        # nodes are checked first
+        result = self.schema.execute(HEAVY_QUERY, backend=backend, variable_values={'first': 5_000})
+        self.assertIsInstance(result.errors[0], NodesLimitReached)
+
+        self.assertEqual(metrics.rejections, {'response_size': 1, 'nodes': 1})
+
+    def test_field_sizes(self):
+        variable_values = {'first': 10}
+
+        backend = ProtectorBackend(max_response_bytes=10_000)
+        result = self.schema.execute(HEAVY_QUERY, backend=backend, variable_values=variable_values)
+        self.assertIsNone(result.errors)
+
+        backend = ProtectorBackend(max_response_bytes=10_000, field_sizes={'String': 1_000})
+        result = self.schema.execute(HEAVY_QUERY, backend=backend, variable_values=variable_values)
+        self.assertIsInstance(result.errors[0], ResponseSizeLimitReached)
+
+    def test_root_field_policy(self):
+        backend = ProtectorBackend(root_field_policies={'Query.viewer': LimitPolicy(max_response_bytes=1_000)})
+
+        result = self.schema.execute(LIGHT_QUERY, backend=backend, variable_values={'first': 10})
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(LIGHT_QUERY, backend=backend, variable_values={'first': 100})
+        self.assertIsInstance(result.errors[0], ResponseSizeLimitReached)
+        self.assertIn('Field viewer', str(result.errors[0]))
+
+    def test_default_field_sizes(self):
+        analysis = analyze_document(self.schema, parse(LIGHT_QUERY), ['first'], field_sizes={})
+        self.assertEqual(
+            get_response_size(analysis[0], {'first': 1}),
+            10 + 2 + 9 + 2 + 9 + DEFAULT_FIELD_SIZES['Int'],
+        )
+
+    def test_paginated_list_of_scalars(self):
+        query_string = 'query Q($first: Int) { viewer { tags(first: $first) } }'
+        analysis = analyze_document(self.schema, parse(query_string), ['first'], field_sizes={})
+        # "viewer":{"tags":[$first strings]}
+        self.assertEqual(get_response_size(analysis[0], {'first': 10}), 10 + 2 + 8 + 10 * 64)
+
+        backend = ProtectorBackend(max_response_bytes=10_000)
+        result = self.schema.execute('{ viewer { tags(first: 100) } }', backend=backend)
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute('{ viewer { tags(first: 100000) } }', backend=backend)
+        self.assertIsInstance(result.errors[0], ResponseSizeLimitReached)
+
+    def test_cache_shared_with_backend_without_size_limit(self):
+        query_string = '{ viewer { books(first: 100) { title pages } } }'
+        cache = LocalAnalysisCache()
+        backend = ProtectorBackend(analysis_cache=cache)
+        limited_backend = ProtectorBackend(max_response_bytes=1_000, analysis_cache=cache)
+
+        result = self.schema.execute(query_string, backend=backend)
+        self.assertIsNone(result.errors)
+
+        result = self.schema.execute(query_string, backend=limited_backend)
+        self.assertIsInstance(result.errors[0], ResponseSizeLimitReached)
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+import graphene
+
+from graphql_limits import (
+    ProtectorBackend,
+    build_schema_tables,
+    get_schema_fingerprint,
+)
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    books = graphene.List(
+        graphene.NonNull(lambda: Book),
+        first=graphene.Int()
+    )
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    author = graphene.Field(User)
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+
+class TestSchemaTables(TestCase):
+    def test_build_schema_tables(self):
+        schema = graphene.Schema(query=Query)
+        tables = build_schema_tables(schema)
+
+        self.assertEqual(tables.fingerprint, get_schema_fingerprint(schema))
+        self.assertEqual(tables.root_types, {'query': 'Query'})
+        self.assertEqual(tables.root_fields, {'Query': ('viewer',)})
+
+    def test_backend_builds_tables_once(self):
+        schema = graphene.Schema(query=Query)
+        backend = ProtectorBackend(depth_limit=5)
+
+        self.assertIs(backend.get_schema_tables(schema), backend.get_schema_tables(schema))
+        self.assertEqual(backend.get_schema_tables(schema), build_schema_tables(schema))
+
+    def test_lazy_import(self):
+        code = (
+            'import sys, graphql_limits; '
+            'graphql_limits.LimitsMetrics; graphql_limits.LocalAnalysisCache; graphql_limits.MmapAnalysisCache; '
+            'assert "graphql" not in sys.modules; '
+            'graphql_limits.ProtectorBackend; '
+            'assert "graphql" in sys.modules'
+        )
+        subprocess.run([sys.executable, '-c', code], check=True)
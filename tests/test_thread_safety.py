@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+import graphene
+
+from graphql_limits import (
+    ProtectorBackend,
+    NodesLimitReached,
+    LimitsMetrics,
+)
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    books = graphene.List(
+        lambda: Book,
+        first=graphene.Int()
+    )
+
+    def resolve_id(self, *args):
+        return 1
+
+    def resolve_books(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    author = graphene.Field(User)
+
+    def resolve_author(self, *args):
+        return {'id': 1}
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+
+QUERY = '''
+    query Test($first: Int, $second: Int) {
+        viewer {
+           books(first: $first) {
+                author {
+                    books(first: 4) {
+                        title
+                    }
+                    books2: books(first: $second) {
+                        title
+                    }
+                }
+           }
+        }
+    }
+'''
+
+
+class TestThreadSafety(TestCase):
+    def test_shared_backend(self):
+        schema = graphene.Schema(query=Query)
+        metrics = LimitsMetrics()
+        # one backend for all threads, variables come with every request
+        backend = ProtectorBackend(nodes_limit=100, metrics=metrics)
+
+        def execute(first):
+            return first, schema.execute(QUERY, backend=backend, variable_values={'first': first, 'second': 1})
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(execute, [1, 50] * 200))
+
+        for first, result in results:
+            if first == 1:
+                self.assertIsNone(result.errors)
+            else:
+                self.assertIsInstance(result.errors[0], NodesLimitReached)
+
+        self.assertEqual(metrics.rejections, {'nodes': 200})
+        self.assertEqual(metrics.cache_hits + metrics.cache_misses, 400)
+        self.assertGreaterEqual(metrics.cache_hits, 400 - 8)
@@ -0,0 +1,217 @@
+from unittest import TestCase, mock
+
+import graphene
+from graphql import parse
+from graphql.validation import validate, specified_rules
+
+from graphql_limits.analysis import OperationAnalysis
+from graphql_limits import (
+    ProtectorBackend,
+    DepthLimitReached,
+    NodesLimitReached,
+    LimitPolicy,
+    analyze_document,
+    get_response_size,
+    limits_rule,
+)
+
+
+class User(graphene.ObjectType):
+    id = graphene.Int()
+    books = graphene.List(
+        lambda: Book,
+        first=graphene.Int()
+    )
+
+    def resolve_id(self, *args):
+        return 1
+
+    def resolve_books(self, *args, **kwargs):
+        return [{'title': 'QQ'}]
+
+
+class Book(graphene.ObjectType):
+    title = graphene.String()
+    author = graphene.Field(User)
+
+    def resolve_author(self, *args):
+        return {'id': 1}
+
+
+class Query(graphene.ObjectType):
+    viewer = graphene.Field(User)
+
+    def resolve_viewer(self, *args):
+        return {'id': 1}
+
+
+FRAGMENTS_QUERY = '''
+    query Q($first: Int) {
+        viewer {
+            books(first: $first) { author { ...authorBooks } }
+            ...userBooks
+        }
+    }
+    fragment authorBooks on User {
+        books(first: 4) { author { ...userBooks } }
+    }
+    fragment userBooks on User {
+        books(first: 100) { title }
+        id
+    }
+'''
+ALIASES_QUERY = '''
+    {
+        a: viewer { ...books ... on User { id b: id } }
+        b: viewer { ...books }
+    }
+    fragment books on User { c: books { title d: title } e: books { ...author } }
+    fragment author on Book { author { id } }
+'''
+# {"title": + 64 bytes of a string
+TITLE_SIZE = 9 + 64
+# {"id": + 3 bytes
+ID_SIZE = 6 + 3
+
+
+class TestValidationRules(TestCase):
+    def setUp(self):
+        self.schema = graphene.Schema(query=Query)
+
+    def analyze(self, document_string, measure_introspection=False, field_sizes=None):
+        return analyze_document(self.schema, parse(document_string), ('first',), measure_introspection, field_sizes)
+
+    def test_analysis(self):
+        analysis = self.analyze('{ viewer { id books(first: 10) { title } } }', field_sizes={'Int': 3})
+
+        self.assertEqual(analysis, (OperationAnalysis(
+            operation='query',
+            introspection=False,
+            # "viewer":{ id "books":[10 * {title}] }
+            root_fields=(('viewer', 4, 10, 10 + 2 + ID_SIZE + 9 + 10 * (2 + TITLE_SIZE)),),
+            aliases=0,
+            max_selections=2,
+            total_fields=4,
+            variable_defaults={},
+        ),))
+
+    def test_analysis_with_fragments(self):
+        analysis = self.analyze(FRAGMENTS_QUERY, field_sizes={'Int': 3})
+
+        user_books_size = 9 + 100 * (2 + TITLE_SIZE) + ID_SIZE
+        author_books_size = 9 + 4 * (2 + 10 + 2 + user_books_size)
+        self.assertEqual(analysis, (OperationAnalysis(
+            operation='query',
+            introspection=False,
+            root_fields=((
+                'viewer',
+                # fragments are levels too: viewer books author authorBooks books author userBooks books title
+                10,
+                # $first * 4 * 100 + 100
+                (1, 100, (('first', 400, ()),)),
+                (1, 10, ((1, 2 + user_books_size, ((1, 9, (('first', 2 + 10 + 2 + author_books_size, ()),)),)),)),
+            ),),
+            aliases=0,
+            max_selections=3,
+            # userBooks is spread twice
+            total_fields=3 + 2 + 3 * 2,
+            variable_defaults={},
+        ),))
+        self.assertEqual(get_response_size(analysis[0], {'first': 2}), 10 + 2 + user_books_size + 9 + 2 * (
+            2 + 10 + 2 + author_books_size
+        ))
+
+    def test_analysis_with_aliases(self):
+        analysis = self.analyze(ALIASES_QUERY, field_sizes={'Int': 3})
+
+        # c: books { title d: title } e: books { author { id } }
+        books_size = 5 + 2 + TITLE_SIZE + 5 + 64 + 5 + 2 + 10 + 2 + ID_SIZE
+        self.assertEqual(analysis, (OperationAnalysis(
+            operation='query',
+            introspection=False,
+            root_fields=(
+                ('viewer', 7, 3, 5 + 2 + books_size + ID_SIZE + 5 + 3),
+                ('viewer', 7, 2, 5 + 2 + books_size),
+            ),
+            aliases=3 + 3 * 2,
+            max_selections=4,
+            total_fields=4 + 4 * 2 + 2 * 2,
+            variable_defaults={},
+        ),))
+
+    def test_analysis_of_introspection(self):
+        query_string = '{ __schema { types { name fields { name } } } }'
+
+        analysis = self.analyze(query_string, field_sizes={})
+        self.assertEqual(analysis[0].introspection, True)
+        self.assertEqual(analysis[0].root_fields, (('__schema', 2, 1, 0),))
+
+        analysis = self.analyze(query_string, measure_introspection=True, field_sizes={})
+        # "__schema":{"types":{ name "fields":{ name } }}
+        name_size = 8 + 64
+        self.assertEqual(analysis[0].root_fields, (
+            ('__schema', 5, 1, 12 + 2 + 9 + 2 + name_size + 10 + 2 + name_size),
+        ))
+
+    def test_response_size_is_not_measured_without_field_sizes(self):
+        analysis = self.analyze('{ viewer { books(first: 3) { title } } }')
+
+        self.assertEqual(analysis[0].root_fields, (('viewer', 4, 3, 0),))
+
+    def test_inline_fragments(self):
+        analysis = self.analyze('{ ... on Query { viewer { books(first: 3) { title } } } }')
+
+        self.assertEqual(analysis[0].root_fields, (('viewer', 4, 3, 0),))
+
+    def test_limits_rule(self):
+        document_ast = parse('query Q($first: Int) { viewer { books(first: $first) { author { id } } } }')
+
+        errors = validate(self.schema, document_ast, specified_rules + [limits_rule(depth_limit=3)])
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], DepthLimitReached)
+
+        rule = limits_rule(nodes_limit=10, variable_values={'first': 20})
+        errors = validate(self.schema, document_ast, specified_rules + [rule])
+        self.assertIsInstance(errors[0], NodesLimitReached)
+
+        rule = limits_rule(
+            nodes_limit=10,
+            variable_values={'first': 20},
+            operation_policies={'query': LimitPolicy(nodes_limit=100)},
+        )
+        self.assertEqual(validate(self.schema, document_ast, specified_rules + [rule]), [])
+
+    def test_limits_rule_with_variable_defaults(self):
+        query_string = 'query Q($first: Int = 20) { viewer { books(first: $first) { title } } }'
+        self.assertEqual(self.analyze(query_string)[0].variable_defaults, {'first': 20})
+        document_ast = parse(query_string)
+
+        errors = validate(self.schema, document_ast, specified_rules + [limits_rule(nodes_limit=10)])
+        self.assertIsInstance(errors[0], NodesLimitReached)
+
+        rule = limits_rule(nodes_limit=10, variable_values={'first': 5})
+        self.assertEqual(validate(self.schema, document_ast, specified_rules + [rule]), [])
+
+        document_ast = parse('query Q($first: Int) { viewer { books(first: $first) { title } } }')
+        self.assertEqual(validate(self.schema, document_ast, specified_rules + [limits_rule(nodes_limit=10)]), [])
+
+    def test_backend_validates_once(self):
+        backend = ProtectorBackend(depth_limit=5, nodes_limit=100)
+        query_string = '{ viewer { books(first: 10) { author { id } } } }'
+
+        # validation with limits happens in the backend, the default validation is skipped
+        with mock.patch('graphql.backend.core.validate', side_effect=AssertionError):
+            result = self.schema.execute(query_string, backend=backend)
+        self.assertIsNone(result.errors)
+
+        # on cache hit only the default validation runs
+        with mock.patch('graphql_limits.query_limit.validate', side_effect=AssertionError):
+            result = self.schema.execute(query_string, backend=backend)
+        self.assertIsNone(result.errors)
+
+    def test_backend_returns_validation_errors(self):
+        backend = ProtectorBackend(depth_limit=5)
+        result = self.schema.execute('{ viewer { unknown } }', backend=backend)
+
+        self.assertEqual(len(result.errors), 1)
+        self.assertIn('unknown', str(result.errors[0]))